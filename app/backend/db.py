@@ -1,6 +1,7 @@
 import os
 
 from dotenv import load_dotenv
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 
@@ -12,11 +13,88 @@ DB_HOST = os.environ.get('DB_HOST')
 DB_PORT = os.environ.get('DB_PORT')
 DB_NAME = os.environ.get('DB_NAME')
 
+# Per worker: every uvicorn worker gets its own pool, so keep
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below Postgres max_connections.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 100))
+DB_ECHO = os.environ.get('DB_ECHO', 'false').lower() in ('1', 'true', 'yes')
+
+# Optional streaming replica for GET routes (see app/backend/replica.py);
+# it uses the same credentials, database name and pool settings.
+DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST')
+DB_REPLICA_PORT = os.environ.get('DB_REPLICA_PORT', DB_PORT)
+
 DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+REPLICA_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_REPLICA_HOST}:{DB_REPLICA_PORT}/{DB_NAME}"
+
+
+def _create_engine(url: str):
+    return create_async_engine(
+        url,
+        echo=DB_ECHO,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={
+            'statement_cache_size': DB_STATEMENT_CACHE_SIZE,
+            'prepared_statement_cache_size': DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = _create_engine(DATABASE_URL)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+replica_engine = _create_engine(REPLICA_DATABASE_URL) if DB_REPLICA_HOST else None
+replica_session_maker = (
+    async_sessionmaker(replica_engine, expire_on_commit=False, class_=AsyncSession) if replica_engine else None
+)
+
+# Engines by the label their pool stats and metrics are reported under.
+engines = {'primary': engine, **({'replica': replica_engine} if replica_engine else {})}
+
+pool_counters = {name: {'connects': 0, 'checkouts': 0, 'invalidations': 0} for name in engines}
+
+
+def _count_pool_events(name: str, sync_engine) -> None:
+    counters = pool_counters[name]
+
+    @event.listens_for(sync_engine, 'connect')
+    def _count_connect(dbapi_connection, connection_record):
+        counters['connects'] += 1
+
+    @event.listens_for(sync_engine, 'checkout')
+    def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+        counters['checkouts'] += 1
+
+    @event.listens_for(sync_engine, 'invalidate')
+    def _count_invalidate(dbapi_connection, connection_record, exception):
+        counters['invalidations'] += 1
+
+
+for _name, _engine in engines.items():
+    _count_pool_events(_name, _engine.sync_engine)
+
+
+def pool_stats() -> dict:
+    stats = {}
+    for name, db_engine in engines.items():
+        pool = db_engine.pool
+        stats[name] = {
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+            **pool_counters[name],
+        }
+    return stats
+
 
 class Base(DeclarativeBase):
     pass
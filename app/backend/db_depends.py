@@ -2,13 +2,50 @@ from typing import AsyncGenerator, Annotated
 
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from starlette.responses import Response
 
-from app.backend.db import async_session_maker
+from app.backend.db import async_session_maker, replica_session_maker
+from app.backend.replica import mark_primary_reads, reads_own_writes, replica_monitor
 
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+async def get_db(request: Request, response: Response) -> AsyncGenerator[AsyncSession, None]:
+    if replica_monitor.enabled and request.method not in SAFE_METHODS:
+        mark_primary_reads(response)
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
 
 
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Session on the replica when it is close enough behind, else the primary.
+
+    Clients that wrote recently stay on the primary (and skip the response
+    cache) so they see their own changes.
+    """
+    request.state.read_primary = reads_own_writes(request)
+
+    if request.state.read_primary or not await replica_monitor.usable():
+        session_maker = async_session_maker
+    else:
+        session_maker = replica_session_maker
+
+    async with session_maker() as session:
+        yield session
+
+
+async def release_connection(db: AsyncSession) -> None:
+    """Give the session's connection back to the pool ahead of slow non-DB work.
+
+    Sessions only check a connection out on their first statement and return
+    it on commit, but read-only handlers never commit, so the connection would
+    otherwise stay checked out (idle in transaction) through serialization.
+    Loaded objects stay readable and the session reconnects if used again.
+    """
+    await db.close()
+
+
 DbSessionDep = Annotated[AsyncSession, Depends(get_db)]
+ReadDbSessionDep = Annotated[AsyncSession, Depends(get_read_db)]
@@ -0,0 +1,89 @@
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from loguru import logger
+from sqlalchemy import event
+from starlette.requests import Request
+
+from app.backend.db import engines
+
+# Dev/test instrumentation: 'warn' logs requests that go over their statement
+# budget or repeat one statement shape (a likely N+1), 'raise' fails them.
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'off')
+QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 10))
+QUERY_REPEAT_LIMIT = int(os.environ.get('QUERY_REPEAT_LIMIT', 3))
+
+# Bind placeholders, including expanded IN lists, collapse to one marker so
+# the same query with different arguments has the same shape.
+_PLACEHOLDERS = re.compile(r'\$\d+(?:::[\w ]+)?(?:\s*,\s*\$\d+(?:::[\w ]+)?)*')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    __slots__ = ('count', 'duration', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] | None = Counter() if QUERY_BUDGET_MODE != 'off' else None
+
+
+# Set per request by the middleware; queries issued outside a request are not counted.
+current_query_stats: ContextVar[QueryStats | None] = ContextVar('current_query_stats', default=None)
+
+
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+        if stats.statements is not None:
+            stats.statements[_PLACEHOLDERS.sub('?', statement)] += 1
+
+
+# Replica reads count against the same per-request budget as primary ones.
+for _engine in engines.values():
+    event.listen(_engine.sync_engine, 'before_cursor_execute', _start_timer)
+    event.listen(_engine.sync_engine, 'after_cursor_execute', _stop_timer)
+
+
+def query_budget(limit: int):
+    """Override QUERY_BUDGET for one route; put it below the router decorator."""
+
+    def decorator(func):
+        func.query_budget = limit
+        return func
+
+    return decorator
+
+
+def check_query_budget(request: Request, stats: QueryStats):
+    if stats.statements is None:
+        return
+
+    route = request.scope.get('route')
+    budget = getattr(getattr(route, 'endpoint', None), 'query_budget', QUERY_BUDGET)
+
+    problems = []
+    if stats.count > budget:
+        problems.append(f'{stats.count} statements, budget is {budget}')
+    for shape, times in stats.statements.items():
+        if times >= QUERY_REPEAT_LIMIT:
+            problems.append(f'same statement {times} times (possible N+1): {shape[:300]}')
+
+    if problems:
+        message = f"{request.method} {getattr(route, 'path', request.url.path)}: " + '; '.join(problems)
+        if QUERY_BUDGET_MODE == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.backend.db import replica_engine
+
+# Reads go to the primary while the replica is further behind than this.
+DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', 5))
+DB_REPLICA_CHECK_INTERVAL = float(os.environ.get('DB_REPLICA_CHECK_INTERVAL', 1.0))
+DB_REPLICA_CHECK_TIMEOUT = float(os.environ.get('DB_REPLICA_CHECK_TIMEOUT', 1.0))
+# After a write, the same client reads from the primary for this long.
+DB_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))
+
+READ_PRIMARY_COOKIE = 'read_primary_until'
+
+# Zero when streaming and caught up with everything received; an idle
+# primary would otherwise look like growing lag. Without a live WAL receiver
+# nothing new arrives, so the age of the last replayed commit is the lag,
+# and NULL (nothing replayed yet) counts as unusable. Reading the receiver's
+# status needs pg_read_all_stats; without it the status is NULL and only
+# the receiver's presence is checked.
+LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() AND EXISTS ("
+    "SELECT 1 FROM pg_stat_wal_receiver WHERE coalesce(status, 'streaming') = 'streaming'"
+    ") THEN 0 "
+    "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class ReplicaMonitor:
+    """Worker-local replica lag, re-measured at most every
+    DB_REPLICA_CHECK_INTERVAL seconds.
+
+    Measurements run in a background task, so a slow or unreachable replica
+    never holds up the requests asking about it; reads go to the primary
+    while the last result is missing or overdue.
+    """
+
+    def __init__(self, engine: AsyncEngine | None):
+        self._engine = engine
+        self.lag: float | None = None
+        self._checked_at: float | None = None
+        self._refresh_task: asyncio.Task | None = None
+        # Tests can point both engines at one database and set this to
+        # pretend the replica is that many seconds behind.
+        self.simulated_lag: float | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._engine is not None
+
+    def _age(self) -> float | None:
+        return None if self._checked_at is None else time.monotonic() - self._checked_at
+
+    async def _measure(self) -> float | None:
+        if self.simulated_lag is not None:
+            return self.simulated_lag
+
+        try:
+            async with asyncio.timeout(DB_REPLICA_CHECK_TIMEOUT):
+                async with self._engine.connect() as conn:
+                    lag = await conn.scalar(LAG_QUERY)
+                    return None if lag is None else float(lag)
+        except (DBAPIError, OSError, TimeoutError) as ex:
+            logger.warning(f'Replica lag check failed: {ex!r}')
+            return None
+
+    async def _refresh(self) -> None:
+        try:
+            self.lag = await self._measure()
+            self._checked_at = time.monotonic()
+        finally:
+            self._refresh_task = None
+
+    async def usable(self) -> bool:
+        if not self.enabled:
+            return False
+
+        age = self._age()
+        if (age is None or age >= DB_REPLICA_CHECK_INTERVAL) and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh())
+
+        # A measurement takes at most DB_REPLICA_CHECK_TIMEOUT; older results
+        # mean checks have stopped, and the lag may have grown since.
+        if age is None or age >= DB_REPLICA_CHECK_INTERVAL + DB_REPLICA_CHECK_TIMEOUT:
+            return False
+        return self.lag is not None and self.lag <= DB_REPLICA_MAX_LAG
+
+    def stats(self) -> dict:
+        return {'enabled': self.enabled, 'lag': self.lag, 'max_lag': DB_REPLICA_MAX_LAG}
+
+
+replica_monitor = ReplicaMonitor(replica_engine)
+
+
+def mark_primary_reads(response: Response) -> None:
+    response.set_cookie(
+        READ_PRIMARY_COOKIE,
+        str(int(time.time()) + DB_REPLICA_STICKY_SECONDS),
+        max_age=DB_REPLICA_STICKY_SECONDS,
+        httponly=True,
+        samesite='lax',
+    )
+
+
+def reads_own_writes(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
@@ -1,4 +1,7 @@
+import asyncio
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta, datetime, timezone
 from functools import wraps
 from typing import Annotated
@@ -8,26 +11,118 @@ from dotenv import load_dotenv
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from starlette import status
 
-from app.backend.db_depends import DbSessionDep
+from app.backend.db import async_session_maker
+from app.backend.db_depends import DbSessionDep, release_connection
+from app.helpers.token_cache import token_cache
 from app.models import User
 
 load_dotenv()
 
 SECRET_KEY = os.environ.get('SECRET_KEY')
 ALGORITHM = os.environ.get('ALGORITHM')
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get('ACCESS_TOKEN_EXPIRE_MINUTES', 20))
+# How often a worker re-reads recent users.token_generation changes; a
+# permission change takes effect on every worker within this many seconds.
+TOKEN_REVOCATION_CHECK_INTERVAL = float(os.environ.get('TOKEN_REVOCATION_CHECK_INTERVAL', 1.0))
 
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 32))
+
+bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto', bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop on a small dedicated thread pool.
+
+    Jobs beyond the worker count wait in the executor queue; once that queue
+    is full, callers get a 503 instead of piling up behind each other.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._capacity = workers + queue_size
+        self._pending = 0
+
+    async def _run(self, func, *args):
+        if self._pending >= self._capacity:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail='Authentication service is busy, try again later',
+                headers={'Retry-After': '1'},
+            )
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(bcrypt_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(bcrypt_context.verify, password, hashed_password)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE)
+
+
+class TokenRevocations:
+    """Worker-local view of users.token_generation for recently changed users,
+    refreshed at most every TOKEN_REVOCATION_CHECK_INTERVAL seconds.
+
+    Tokens carry the generation read with their role claims, so no clocks
+    are compared. Only changes younger than a token's lifetime can reject a
+    live token, so that is all that gets loaded; the extra minute covers the
+    change's own transaction, whose now() predates its commit.
+    """
+
+    def __init__(self):
+        self._generations: dict[int, int] = {}
+        self._checked_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self) -> bool:
+        return (self._checked_at is not None
+                and time.monotonic() - self._checked_at < TOKEN_REVOCATION_CHECK_INTERVAL)
+
+    async def is_revoked(self, user_id: int, generation: int) -> bool:
+        if not self._is_fresh():
+            async with self._lock:
+                if not self._is_fresh():
+                    since = func.now() - timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES + 1)
+                    async with async_session_maker() as db:
+                        rows = await db.execute(
+                            select(User.id, User.token_generation).where(User.tokens_valid_after > since)
+                        )
+                    self._generations = dict(rows.all())
+                    self._checked_at = time.monotonic()
+
+        current = self._generations.get(user_id)
+        return current is not None and generation < current
+
+    def expire(self) -> None:
+        """Re-read on next use; call after committing a permission change."""
+        self._checked_at = None
+
+
+token_revocations = TokenRevocations()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
 
 async def authenticate_user(db: DbSessionDep, username: str, password: str):
     user = await db.scalar(select(User).where(User.username == username))
-    if not user or not bcrypt_context.verify(password, user.hashed_password) or user.is_active == False:
+    # Don't hold a pooled connection while bcrypt runs.
+    await release_connection(db)
+    if not user or user.is_active == False or not await password_hasher.verify(password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
@@ -36,21 +131,35 @@ async def authenticate_user(db: DbSessionDep, username: str, password: str):
     return user
 
 
-async def create_access_token(username: str, user_id: int, is_admin: bool,
-                              is_supplier: bool, is_customer: bool, expires_delta: timedelta):
+async def create_access_token(username: str, user_id: int, is_admin: bool, is_supplier: bool,
+                              is_customer: bool, token_generation: int, expires_delta: timedelta):
     payload = {
         'sub': username,
         'id': user_id,
         'is_admin': is_admin,
         'is_supplier': is_supplier,
         'is_customer': is_customer,
+        'gen': token_generation,
         'exp': datetime.now(timezone.utc) + expires_delta
     }
 
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
+async def check_not_revoked(user_id: int, generation: int) -> None:
+    if await token_revocations.is_revoked(user_id, generation):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Token revoked, log in again'
+        )
+
+
 async def get_current_user_payload(token: Annotated[str, Depends(oauth2_scheme)]):
+    cached = token_cache.get(token)
+    if cached is not None:
+        await check_not_revoked(cached['id'], cached.pop('gen'))
+        return cached
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str | None = payload.get('sub')
@@ -65,13 +174,19 @@ async def get_current_user_payload(token: Annotated[str, Depends(oauth2_scheme)]
                 detail='Could not validate user'
             )
 
-        return {
+        user_payload = {
             'username': username,
             'id': user_id,
             'is_admin': is_admin,
             'is_supplier': is_supplier,
             'is_customer': is_customer,
         }
+        # Tokens from before generations existed count as generation 0.
+        generation = payload.get('gen', 0)
+        await check_not_revoked(user_id, generation)
+        token_cache.set(token, {**user_payload, 'gen': generation}, payload.get('exp'))
+
+        return dict(user_payload)
 
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -79,7 +194,7 @@ async def get_current_user_payload(token: Annotated[str, Depends(oauth2_scheme)]
             detail='Token expired!'
         )
 
-    except jwt.exceptions:
+    except jwt.InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Could not validate user'
@@ -89,18 +204,6 @@ async def get_current_user_payload(token: Annotated[str, Depends(oauth2_scheme)]
 CurrUserPayloadDep = Annotated[dict, Depends(get_current_user_payload)]
 
 
-async def get_user(db: AsyncSession, user_id: int) -> User:
-    user = await db.scalar(select(User).where(User.id == user_id))
-
-    if not user or not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail='User not found'
-        )
-
-    return user
-
-
 def user_is_admin(func):
     @wraps(func)
     async def wrapper(*args, **kwargs):
@@ -0,0 +1,301 @@
+import csv
+import json
+import os
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from slugify import slugify
+from sqlalchemy import BigInteger, Integer, String, case, cast, column, func, literal_column, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from starlette.requests import Request
+
+from app.backend.db_depends import release_connection
+from app.helpers.category import category_cache
+from app.helpers.versions import PRODUCTS, bump_version
+from app.models import Product
+from app.schemas import INT4_MAX, INT4_MIN, CreateProduct, StockUpdate
+
+BULK_CHUNK_SIZE = int(os.environ.get('BULK_CHUNK_SIZE', 500))
+
+
+def _decode(line: bytes) -> str | None:
+    try:
+        return line.decode()
+    except UnicodeDecodeError:
+        return None
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str | None]:
+    """Yield decoded lines; None stands in for a line that isn't valid UTF-8."""
+    buffer = b''
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            yield _decode(line)
+    if buffer:
+        yield _decode(buffer)
+
+
+async def read_rows(request: Request) -> AsyncIterator[tuple[dict | None, str | None]]:
+    """Yield (row, parse error) pairs from a JSON array, NDJSON or CSV body.
+
+    NDJSON and CSV are parsed as the body streams in; CSV needs a header row
+    and records can't contain embedded newlines.
+    """
+    content_type = request.headers.get('content-type', '').split(';')[0].strip()
+
+    if content_type in ('application/x-ndjson', 'application/jsonl'):
+        async for line in _iter_lines(request):
+            if line is None:
+                yield None, 'Invalid UTF-8'
+                continue
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line), None
+            except ValueError:
+                yield None, 'Invalid JSON'
+
+    elif content_type == 'text/csv':
+        header = None
+        async for line in _iter_lines(request):
+            if line is None:
+                if header is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail='CSV header is not valid UTF-8'
+                    )
+                yield None, 'Invalid UTF-8'
+                continue
+            if not line.strip():
+                continue
+            fields = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in fields]
+            else:
+                yield dict(zip(header, fields)), None
+
+    elif content_type == 'application/json':
+        try:
+            rows = await request.json()
+        except ValueError:
+            # Covers JSONDecodeError and UnicodeDecodeError.
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail='Invalid JSON'
+            )
+        if not isinstance(rows, list):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail='Expected a JSON array of products'
+            )
+        for row in rows:
+            yield row, None
+
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail='Send application/json, application/x-ndjson or text/csv'
+        )
+
+
+async def _write_chunk(db: AsyncSession, chunk: list[tuple[int, dict]], result: dict) -> None:
+    stmt = insert(Product).values([product for _, product in chunk])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Product.slug],
+        set_={
+            name: stmt.excluded[name]
+            for name in ('name', 'description', 'price', 'image_url', 'stock', 'category_id', 'is_active')
+        },
+        # Another supplier's product with the same slug is left untouched.
+        where=Product.supplier_id == stmt.excluded.supplier_id,
+    ).returning(Product.slug, literal_column('xmax = 0').label('inserted'))
+
+    try:
+        written = {row.slug: row.inserted for row in await db.execute(stmt)}
+        await db.commit()
+    except DBAPIError:
+        await db.rollback()
+        result['errors'].extend({'row': row_no, 'detail': 'Could not save product'} for row_no, _ in chunk)
+        return
+
+    await bump_version(db, PRODUCTS)
+
+    for row_no, product in chunk:
+        if product['slug'] not in written:
+            result['errors'].append({'row': row_no, 'detail': 'Product belongs to another supplier'})
+        elif written[product['slug']]:
+            result['created'] += 1
+        else:
+            result['updated'] += 1
+
+
+def _column_error(values: dict) -> str | None:
+    """Catch values Postgres would reject, so one bad row can't fail its whole chunk."""
+    for name, value in values.items():
+        col_type = Product.__table__.c[name].type
+        if value is None:
+            continue
+        if isinstance(col_type, String) and col_type.length and len(value) > col_type.length:
+            return f'{name} is longer than {col_type.length} characters'
+        if isinstance(col_type, Integer) and not INT4_MIN <= value <= INT4_MAX:
+            return f'{name} is out of range'
+    return None
+
+
+async def import_products(db: AsyncSession, request: Request, supplier_id: int) -> dict:
+    """Validate and upsert products by slug, committing every BULK_CHUNK_SIZE rows."""
+    tree = await category_cache.get(db)
+    # The body may take a while to stream in; only hold a connection per chunk.
+    await release_connection(db)
+    result = {'created': 0, 'updated': 0, 'errors': []}
+    seen_slugs = set()
+    chunk = []
+    row_no = 0
+
+    async for data, error in read_rows(request):
+        row_no += 1
+        if error is None:
+            try:
+                product = CreateProduct.model_validate(data)
+            except ValidationError as ex:
+                error = ex.errors(include_url=False, include_input=False, include_context=False)
+
+        if error is None:
+            slug = slugify(product.name)
+            if product.category not in tree.by_id:
+                error = 'There is no such category'
+            elif slug in seen_slugs:
+                error = 'Duplicate product in import'
+
+        if error is None:
+            row = {
+                'name': product.name,
+                'slug': slug,
+                'description': product.description,
+                'price': product.price,
+                'image_url': product.image_url,
+                'stock': product.stock,
+                'category_id': product.category,
+                'supplier_id': supplier_id,
+                'is_active': True,
+            }
+            error = _column_error(row)
+
+        if error is not None:
+            result['errors'].append({'row': row_no, 'detail': error})
+            continue
+
+        seen_slugs.add(slug)
+        chunk.append((row_no, row))
+
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await _write_chunk(db, chunk, result)
+            chunk = []
+
+    if chunk:
+        await _write_chunk(db, chunk, result)
+
+    return result
+
+
+async def apply_stock_updates(db: AsyncSession, updates: list[StockUpdate], supplier_id: int | None) -> dict:
+    """Apply stock and price changes in one UPDATE ... FROM (VALUES ...).
+
+    Decrements only apply while stock stays non-negative, so concurrent
+    writers can't oversell; increments that would overflow the column are
+    rejected the same way. supplier_id limits the update to that supplier's
+    products; pass None for admins.
+    """
+    # Resolve slugs first, so a product named once by id and once by slug
+    # counts as a duplicate and the UPDATE can join on the id alone.
+    slugs = {u.slug for u in updates if u.id is None}
+    slug_ids = {}
+    if slugs:
+        slug_ids = dict((await db.execute(select(Product.slug, Product.id).where(Product.slug.in_(slugs)))).all())
+    product_ids = [u.id if u.id is not None else slug_ids.get(u.slug) for u in updates]
+
+    known = [product_id for product_id in product_ids if product_id is not None]
+    if len(set(known)) != len(known):
+        # UPDATE ... FROM applies only one of several matching VALUES rows.
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='Each product may appear only once per batch'
+        )
+
+    applied = set()
+    if known:
+        applied = await _update_stock(db, updates, product_ids, supplier_id)
+    failed = [idx for idx in range(len(updates)) if idx not in applied]
+
+    errors = []
+    if failed:
+        # Only on failure: tell a missing product apart from a rejected change.
+        query = select(Product.id, Product.stock).where(
+            Product.id.in_([product_ids[idx] for idx in failed if product_ids[idx] is not None]),
+            Product.is_active == True,
+        )
+        if supplier_id is not None:
+            query = query.where(Product.supplier_id == supplier_id)
+        existing = dict((await db.execute(query)).all())
+
+        for idx in failed:
+            if product_ids[idx] not in existing:
+                detail = 'There is no product found'
+            elif (existing[product_ids[idx]] or 0) + (updates[idx].delta or 0) > INT4_MAX:
+                detail = 'Stock out of range'
+            else:
+                detail = 'Insufficient stock'
+            errors.append({'index': idx, 'detail': detail})
+
+    await db.commit()
+    if applied:
+        await bump_version(db, PRODUCTS)
+
+    return {'updated': len(applied), 'failed': errors}
+
+
+async def _update_stock(
+    db: AsyncSession, updates: list[StockUpdate], product_ids: list[int | None], supplier_id: int | None
+) -> set[int]:
+    """Run the batched UPDATE and return the indexes of the items it applied."""
+    rows = values(
+        column('idx', Integer),
+        column('product_id', Integer),
+        column('delta', Integer),
+        column('absolute', Integer),
+        column('price', Integer),
+        name='rows',
+    ).data([
+        (idx, product_id, u.delta, u.absolute, u.price)
+        for idx, (u, product_id) in enumerate(zip(updates, product_ids))
+        if product_id is not None
+    ])
+    # A column that is NULL in every row would otherwise be typed as text by Postgres.
+    batch = select(*(cast(col, col.type).label(col.key) for col in rows.c)).subquery('batch')
+
+    # bigint, so an increment past the column's range fails its row instead
+    # of the whole statement; NULL stock counts as 0.
+    new_stock = case(
+        (batch.c.absolute.is_not(None), cast(batch.c.absolute, BigInteger)),
+        else_=cast(func.coalesce(Product.stock, 0), BigInteger) + func.coalesce(batch.c.delta, 0),
+    )
+    stmt = (
+        update(Product)
+        .where(
+            Product.id == batch.c.product_id,
+            Product.is_active == True,
+            new_stock.between(0, INT4_MAX),
+        )
+        .values(stock=new_stock, price=func.coalesce(batch.c.price, Product.price))
+        .returning(batch.c.idx)
+    )
+    if supplier_id is not None:
+        stmt = stmt.where(Product.supplier_id == supplier_id)
+
+    return set((await db.execute(stmt)).scalars().all())
@@ -0,0 +1,89 @@
+import asyncio
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import async_session_maker, engine
+from app.helpers.versions import CATEGORIES, version_tracker
+from app.models import Category
+
+
+@dataclass(frozen=True, slots=True)
+class CachedCategory:
+    id: int
+    name: str
+    slug: str
+    is_active: bool
+    parent_id: int | None
+
+
+class CategoryTree:
+    def __init__(self, categories: list[CachedCategory], version: int):
+        self.version = version
+        self.by_id = {cat.id: cat for cat in categories}
+        self.by_slug = {cat.slug: cat for cat in categories}
+        self.children: dict[int, list[int]] = {}
+        for cat in categories:
+            if cat.parent_id is not None:
+                self.children.setdefault(cat.parent_id, []).append(cat.id)
+
+    def active(self) -> list[CachedCategory]:
+        return [cat for cat in self.by_id.values() if cat.is_active]
+
+    def get_active(self, category_id: int) -> CachedCategory | None:
+        category = self.by_id.get(category_id)
+        return category if category and category.is_active else None
+
+    def active_subtree(self, category_slug: str) -> list[int] | None:
+        """Ids of the active category with this slug and all its active descendants."""
+        root = self.by_slug.get(category_slug)
+        if root is None or not root.is_active:
+            return None
+
+        ids, stack, seen = [], [root.id], {root.id}
+        while stack:
+            cat_id = stack.pop()
+            ids.append(cat_id)
+            for child_id in self.children.get(cat_id, ()):
+                if child_id not in seen and self.by_id[child_id].is_active:
+                    seen.add(child_id)
+                    stack.append(child_id)
+        return ids
+
+
+class CategoryCache:
+    """Per-worker copy of the category table.
+
+    Category writes bump the shared 'categories' version, so every worker
+    reloads within VERSION_CHECK_INTERVAL of a commit. The tree and its
+    version always come from the primary, even for replica sessions, so a
+    lagging replica can't overwrite it with an older copy.
+    """
+
+    def __init__(self):
+        self._tree: CategoryTree | None = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, db: AsyncSession) -> CategoryTree:
+        if db.bind is not engine:
+            async with async_session_maker() as primary:
+                return await self.get(primary)
+
+        (version,) = await version_tracker.get(db, CATEGORIES)
+        if self._tree is not None and self._tree.version == version:
+            return self._tree
+
+        async with self._lock:
+            if self._tree is None or self._tree.version != version:
+                rows = await db.execute(
+                    select(
+                        Category.id, Category.name, Category.slug, Category.is_active, Category.parent_id
+                    ).order_by(Category.id)
+                )
+                self._tree = CategoryTree([CachedCategory(*row) for row in rows], version)
+
+        return self._tree
+
+
+category_cache = CategoryCache()
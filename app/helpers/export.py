@@ -0,0 +1,26 @@
+import json
+import os
+from typing import Annotated, AsyncIterator, Literal
+
+from fastapi import Query
+from sqlalchemy import Select
+from starlette.responses import StreamingResponse
+
+from app.backend.db import async_session_maker
+
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+
+FormatParam = Annotated[Literal['json', 'ndjson'], Query()]
+
+
+async def stream_ndjson(query: Select) -> AsyncIterator[bytes]:
+    # The request's DbSessionDep is closed before the body is streamed,
+    # so the export holds its own session for the lifetime of the cursor.
+    async with async_session_maker() as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        async for rows in result.mappings().partitions():
+            yield ''.join(json.dumps(dict(row), default=str) + '\n' for row in rows).encode()
+
+
+def ndjson_response(query: Select) -> StreamingResponse:
+    return StreamingResponse(stream_ndjson(query), media_type='application/x-ndjson')
@@ -0,0 +1,39 @@
+import os
+
+from sqlalchemy import ARRAY, Integer, Select, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ProductListing
+
+# Upper bounds of the price facet buckets; the last bucket is open-ended.
+PRICE_FACET_BUCKETS = [int(edge) for edge in os.environ.get('PRICE_FACET_BUCKETS', '10,50,100,500,1000').split(',')]
+
+
+async def product_facets(db: AsyncSession, query: Select) -> dict:
+    """Counts per category and per price bucket for a filtered product query.
+
+    Both facets come from one GROUPING SETS aggregate over the same filters.
+    """
+    filtered = query.with_only_columns(ProductListing.category_id, ProductListing.price).order_by(None).subquery()
+    bucket = func.width_bucket(filtered.c.price, literal(PRICE_FACET_BUCKETS, ARRAY(Integer)))
+
+    rows = await db.execute(
+        select(
+            func.grouping(filtered.c.category_id).label('by_price'),
+            filtered.c.category_id,
+            bucket.label('bucket'),
+            func.count().label('count'),
+        ).group_by(func.grouping_sets(filtered.c.category_id, bucket))
+    )
+
+    categories, prices = [], []
+    edges = [None, *PRICE_FACET_BUCKETS, None]
+    for row in rows:
+        if not row.by_price:
+            categories.append({'category_id': row.category_id, 'count': row.count})
+        elif row.bucket is not None:
+            prices.append({'min': edges[row.bucket], 'max': edges[row.bucket + 1], 'count': row.count})
+
+    categories.sort(key=lambda facet: -facet['count'])
+    prices.sort(key=lambda facet: facet['min'] or 0)
+    return {'categories': categories, 'price': prices}
@@ -0,0 +1,99 @@
+import base64
+import binascii
+import json
+import sys
+from typing import Annotated, Any, NamedTuple, Sequence
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Integer, Select, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+from starlette import status
+
+from app.schemas import INT4_MAX, INT4_MIN
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+LimitParam = Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)]
+
+
+class KeysetSort(NamedTuple):
+    name: str
+    columns: tuple[ColumnElement, ...]
+    descending: bool = False
+
+
+def encode_cursor(sort: KeysetSort, values: Sequence[Any]) -> str:
+    raw = json.dumps({'s': sort.name, 'k': list(values)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _value_matches(column: ColumnElement, value: Any) -> bool:
+    """Whether a decoded cursor value can be bound against this sort column."""
+    try:
+        expected = column.type.python_type
+    except NotImplementedError:
+        return True
+
+    if isinstance(value, bool) or value is None:
+        return expected is bool and value is not None
+    if expected is float:
+        # An int too large for a double fails when bound.
+        return isinstance(value, float) or (isinstance(value, int) and abs(value) <= sys.float_info.max)
+    if isinstance(column.type, Integer):
+        return isinstance(value, int) and INT4_MIN <= value <= INT4_MAX
+    return isinstance(value, expected)
+
+
+def decode_cursor(sort: KeysetSort, cursor: str) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload['k']
+        valid = (
+            payload['s'] == sort.name
+            and len(values) == len(sort.columns)
+            and all(_value_matches(col, value) for col, value in zip(sort.columns, values))
+        )
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        valid = False
+
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Invalid cursor'
+        )
+
+    return values
+
+
+def apply_keyset(query: Select, sort: KeysetSort, cursor: str | None, limit: int) -> Select:
+    """Seek past the cursor on the sort key instead of using OFFSET.
+
+    One extra row is fetched so build_page can tell whether a next page exists.
+    A row comparison with a NULL member is NULL, so rows with a NULL sort key
+    can't be paged through; sorts on nullable columns leave them out.
+    """
+    for col in sort.columns:
+        if getattr(col, 'nullable', False):
+            query = query.where(col.is_not(None))
+
+    key = tuple_(*sort.columns)
+
+    if cursor is not None:
+        values = tuple_(*decode_cursor(sort, cursor))
+        query = query.where(key < values if sort.descending else key > values)
+
+    order = [col.desc() if sort.descending else col.asc() for col in sort.columns]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def build_page(rows: Sequence, sort: KeysetSort, limit: int) -> dict:
+    items = list(rows[:limit])
+    next_cursor = None
+
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(sort, [getattr(last, col.key) for col in sort.columns])
+
+    return {'items': items, 'next_cursor': next_cursor}
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import time
+
+from loguru import logger
+from sqlalchemy import and_, func, select, update
+
+from app.backend.db import async_session_maker
+from app.helpers.review import rating_value
+from app.helpers.versions import PRODUCTS, REVIEWS, bump_version
+from app.models import Product, Review
+
+# 'immediate' updates products.rating in the review's own transaction;
+# 'deferred' only inserts the review and leaves the rating, and the cache
+# version bumps, to the flusher.
+REVIEW_RATING_MODE = os.environ.get('REVIEW_RATING_MODE', 'immediate')
+REVIEW_RATING_FLUSH_MS = int(os.environ.get('REVIEW_RATING_FLUSH_MS', 250))
+REVIEW_RATING_BATCH_SIZE = int(os.environ.get('REVIEW_RATING_BATCH_SIZE', 500))
+# Once a pending rating is older than this (the flusher is failing or falling
+# behind), new reviews go back to updating the rating inline.
+REVIEW_RATING_MAX_STALENESS = float(os.environ.get('REVIEW_RATING_MAX_STALENESS', 5))
+
+
+class RatingAggregator:
+    """Worker-local set of products whose rating is behind their reviews,
+    recomputed together every REVIEW_RATING_FLUSH_MS milliseconds.
+
+    Ratings are rebuilt from the active reviews rather than from deltas, so
+    flushing a product twice, or alongside an inline update, is harmless.
+    Marks live in memory: a worker that dies loses them, and those products
+    catch up on their next review.
+    """
+
+    def __init__(self, deferred: bool):
+        self.deferred = deferred
+        self._dirty: dict[int, float] = {}
+        self._pending_since: float | None = None
+        self.flushed = 0
+        self.failures = 0
+
+    def staleness(self) -> float:
+        if self._pending_since is None:
+            return 0.0
+        return time.monotonic() - self._pending_since
+
+    def accepting(self) -> bool:
+        return self.deferred and self.staleness() <= REVIEW_RATING_MAX_STALENESS
+
+    def mark_dirty(self, product_id: int) -> None:
+        """Call after the review is committed, so the next flush can see it."""
+        now = time.monotonic()
+        self._dirty.setdefault(product_id, now)
+        if self._pending_since is None:
+            self._pending_since = now
+
+    def _requeue(self, batch: dict[int, float], product_ids: list[int]) -> None:
+        for product_id in product_ids:
+            self._dirty[product_id] = min(batch[product_id], self._dirty.get(product_id, batch[product_id]))
+
+    async def _recompute(self, product_ids: list[int]) -> None:
+        totals = (
+            select(
+                Product.id.label('product_id'),
+                func.coalesce(func.sum(Review.grade), 0).label('rating_sum'),
+                func.count(Review.id).label('rating_count'),
+            )
+            .outerjoin(Review, and_(Review.product_id == Product.id, Review.is_active == True))
+            .where(Product.id.in_(product_ids))
+            .group_by(Product.id)
+            .subquery()
+        )
+
+        async with async_session_maker() as db:
+            # Lock in id order first: concurrent flushes from other workers
+            # can't deadlock, and the UPDATE below takes a fresh snapshot that
+            # includes any inline rating change that held these rows.
+            await db.execute(
+                select(Product.id).where(Product.id.in_(product_ids)).order_by(Product.id).with_for_update()
+            )
+            await db.execute(
+                update(Product)
+                .where(Product.id == totals.c.product_id)
+                .values(
+                    rating_sum=totals.c.rating_sum,
+                    rating_count=totals.c.rating_count,
+                    rating=rating_value(totals.c.rating_sum, totals.c.rating_count),
+                )
+            )
+            await db.commit()
+            # Deferred reviews skip their own bump, so review listings refresh here too.
+            await bump_version(db, REVIEWS, PRODUCTS)
+
+    async def flush(self) -> int:
+        if not self._dirty:
+            return 0
+
+        batch, self._dirty = self._dirty, {}
+        product_ids = sorted(batch)
+        done = 0
+        try:
+            for start in range(0, len(product_ids), REVIEW_RATING_BATCH_SIZE):
+                await self._recompute(product_ids[start:start + REVIEW_RATING_BATCH_SIZE])
+                done = start + REVIEW_RATING_BATCH_SIZE
+        except Exception as ex:
+            # Includes pool checkout timeouts, which aren't DBAPIErrors.
+            self.failures += 1
+            logger.warning(f'Rating flush failed, will retry: {ex!r}')
+            self._requeue(batch, product_ids[done:])
+        except asyncio.CancelledError:
+            # Shutdown: keep the marks for the final flush in the lifespan.
+            self._requeue(batch, product_ids[done:])
+            raise
+        finally:
+            self._pending_since = min(self._dirty.values(), default=None)
+
+        flushed = min(done, len(product_ids))
+        self.flushed += flushed
+        return flushed
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(REVIEW_RATING_FLUSH_MS / 1000)
+            try:
+                await self.flush()
+            except Exception:
+                # One bad flush must not stop deferred ratings for the worker's lifetime.
+                logger.exception('Rating flusher iteration failed')
+
+    def stats(self) -> dict:
+        return {
+            'mode': 'deferred' if self.deferred else 'immediate',
+            'pending': len(self._dirty),
+            'staleness': round(self.staleness(), 3),
+            'flushed': self.flushed,
+            'failures': self.failures,
+        }
+
+
+rating_aggregator = RatingAggregator(REVIEW_RATING_MODE == 'deferred')
@@ -0,0 +1,137 @@
+import hashlib
+import inspect
+import os
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import NamedTuple, Protocol
+
+from fastapi.encoders import jsonable_encoder
+from starlette import status
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from app.backend.db_depends import release_connection
+from app.helpers.serializers import dump_json
+from app.helpers.versions import version_tracker
+
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))
+RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', 60))
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> CachedResponse | None: ...
+
+    async def set(self, key: str, value: CachedResponse, ttl: float) -> None: ...
+
+
+class LocalCacheBackend:
+    """In-process LRU with a per-entry TTL."""
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, CachedResponse]] = OrderedDict()
+
+    async def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: CachedResponse, ttl: float) -> None:
+        if self._max_size <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+
+class ResponseCache:
+    """Serialized GET responses keyed by URL and the versions of their tags.
+
+    Writers bump a tag's version instead of deleting keys, so stale entries
+    simply stop being addressed. That also makes any shared backend
+    implementing CacheBackend (assigned to `backend` at startup) safe to use
+    across workers without a delete fan-out.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def key(request: Request, tags: tuple[str, ...], versions: tuple[int, ...]) -> str:
+        query = '&'.join(sorted(request.url.query.split('&'))) if request.url.query else ''
+        tag_part = ','.join(f'{tag}:{version}' for tag, version in zip(tags, versions))
+        return f'{tag_part}|{request.url.path}?{query}'
+
+
+response_cache = ResponseCache(LocalCacheBackend(RESPONSE_CACHE_SIZE), RESPONSE_CACHE_TTL)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+def cached_response(*tags: str):
+    """Cache a public GET handler's JSON and answer If-None-Match with 304.
+
+    The handler must take `request` and `db` arguments. Its return annotation
+    is the response model: FastAPI documents it, and results are serialized
+    through it here. Handlers that return a Response themselves (e.g. NDJSON
+    exports) bypass the cache.
+    """
+
+    def decorator(func):
+        model = inspect.signature(func).return_annotation
+        if model is inspect.Signature.empty:
+            model = None
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs['request']
+            versions = await version_tracker.get(kwargs['db'], *tags)
+            key = ResponseCache.key(request, tags, versions)
+
+            # Clients that just wrote read the primary; don't answer them from cache.
+            fresh_read = getattr(request.state, 'read_primary', False)
+            cached = None if fresh_read else await response_cache.backend.get(key)
+            if cached is None:
+                result = await func(*args, **kwargs)
+                if isinstance(result, Response):
+                    return result
+
+                await release_connection(kwargs['db'])
+
+                if model is None:
+                    body = JSONResponse(jsonable_encoder(result)).body
+                else:
+                    body = dump_json(model, result)
+                cached = CachedResponse(body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+                await response_cache.backend.set(key, cached, response_cache.ttl)
+
+            headers = {'ETag': cached.etag, 'Cache-Control': 'no-cache'}
+            if _etag_matches(request.headers.get('if-none-match'), cached.etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            return Response(cached.body, media_type='application/json', headers=headers)
+
+        return wrapper
+
+    return decorator
@@ -1,5 +1,5 @@
 from fastapi import HTTPException
-from sqlalchemy import select, ScalarResult, Executable
+from sqlalchemy import ScalarResult, Executable, Integer, Numeric, case, cast, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
@@ -33,14 +33,73 @@ async def get_objects_or_404(db: AsyncSession, query: Executable,
     return objs
 
 
-async def calculate_rating(db: AsyncSession, product: Product):
-    reviews = await db.scalars(select(Review.grade).where(
-        Review.product_id == product.id,
-        Review.is_active == True
-    ))
-    all_reviews = reviews.all()
-    if not all_reviews:
-        new_rating = 0
-    else:
-        new_rating = round(sum(all_reviews) / len(all_reviews), 2)
-    product.rating = new_rating
+async def get_row_or_404(db: AsyncSession, query: Executable,
+                         error_message: str = 'Object not found'):
+    row = (await db.execute(query)).first()
+
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=error_message
+        )
+
+    return row
+
+
+async def get_rows_or_404(db: AsyncSession, query: Executable,
+                          error_message: str = 'Object not found'):
+    rows = (await db.execute(query)).all()
+
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=error_message
+        )
+
+    return rows
+
+
+def rating_value(rating_sum, rating_count):
+    """The stored rating: the mean grade rounded to two places, 0 without reviews."""
+    return case(
+        (rating_count > 0, func.round(cast(rating_sum / rating_count, Numeric), 2)),
+        else_=0,
+    )
+
+
+async def apply_rating_delta(db: AsyncSession, product_id: int, grade_delta: float, count_delta: int):
+    """Fold one review insert or soft-delete into the product's running rating.
+
+    The increment happens in a single UPDATE, so concurrent reviewers can't
+    overwrite each other's totals.
+    """
+    new_sum = Product.rating_sum + grade_delta
+    new_count = Product.rating_count + count_delta
+
+    await db.execute(
+        update(Product)
+        .where(Product.id == product_id)
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating=rating_value(new_sum, new_count),
+        )
+    )
+
+
+async def grade_histograms(db: AsyncSession, product_ids: set[int]) -> dict[int, list[dict]]:
+    """Active review counts per whole grade for each product, in one GROUP BY."""
+    grade = cast(func.floor(Review.grade), Integer).label('grade')
+
+    rows = await db.execute(
+        select(Review.product_id, grade, func.count().label('count'))
+        .where(Review.product_id.in_(product_ids), Review.is_active == True)
+        .group_by(Review.product_id, grade)
+        .order_by(Review.product_id, grade)
+    )
+
+    histograms = {product_id: [] for product_id in product_ids}
+    for row in rows:
+        histograms[row.product_id].append({'grade': row.grade, 'count': row.count})
+
+    return histograms
@@ -0,0 +1,28 @@
+from functools import lru_cache
+from typing import Any
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import inspect
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.sql.elements import ColumnElement
+
+
+@lru_cache(maxsize=None)
+def _adapter(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def dump_json(model: Any, value: Any) -> bytes:
+    """Serialize ORM objects, rows or dicts through a response model.
+
+    Validation and encoding both run in pydantic-core against a schema that is
+    built once per model, instead of jsonable_encoder walking every object.
+    """
+    adapter = _adapter(model)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+def model_columns(entity: type[DeclarativeBase], schema: type[BaseModel]) -> list[ColumnElement]:
+    """Columns of `entity` that `schema` exposes, for selecting only what is returned."""
+    column_attrs = inspect(entity).column_attrs
+    return [getattr(entity, name) for name in schema.model_fields if name in column_attrs]
@@ -0,0 +1,62 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = float(os.environ.get('TOKEN_CACHE_TTL', 300))
+
+
+class TokenCache:
+    """LRU of already verified JWT payloads keyed by the token's SHA-256 digest.
+
+    An entry lives until the earlier of the token's exp and TOKEN_CACHE_TTL.
+    Entries are not revoked here: callers check the token's generation
+    against the user's current one on every lookup.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        entry = self._entries.get(key)
+
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(entry[1])
+
+    def set(self, token: str, payload: dict, exp: float | None) -> None:
+        if self._max_size <= 0:
+            return
+
+        expires_at = time.time() + self._ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+
+        key = self._key(token)
+        self._entries[key] = (expires_at, payload)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
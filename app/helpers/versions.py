@@ -0,0 +1,75 @@
+import asyncio
+import os
+import time
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CacheVersion
+
+# How long a worker trusts its in-process caches before re-reading the shared
+# version counters. This bounds how stale other workers can be after a write.
+VERSION_CHECK_INTERVAL = float(os.environ.get('CACHE_VERSION_CHECK_INTERVAL', 1.0))
+
+CATEGORIES = 'categories'
+PRODUCTS = 'products'
+REVIEWS = 'reviews'
+
+
+async def bump_version(db: AsyncSession, *names: str) -> None:
+    """Increment shared version counters once the caller's write is committed.
+
+    The bump is its own short transaction, so no writer holds a counter row
+    while its transaction is open. A row that another writer is bumping right
+    now is skipped rather than waited for: that bump commits after our data
+    did, so readers that see it also see our write.
+    """
+    free_rows = (
+        select(CacheVersion.name)
+        .where(CacheVersion.name.in_(names))
+        .with_for_update(skip_locked=True)
+    )
+    await db.execute(
+        update(CacheVersion)
+        .where(CacheVersion.name.in_(free_rows))
+        .values(version=CacheVersion.version + 1)
+    )
+    await db.commit()
+    version_tracker.expire()
+
+
+class VersionTracker:
+    """Worker-local view of the cache_versions table, refreshed at most every
+    VERSION_CHECK_INTERVAL seconds.
+
+    Counters are kept per engine: a replica's counters lag along with its
+    data, so a cache key built from them never labels old rows as current.
+    """
+
+    def __init__(self):
+        self._versions: dict[object, dict[str, int]] = {}
+        self._checked_at: dict[object, float] = {}
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self, bind) -> bool:
+        checked_at = self._checked_at.get(bind)
+        return checked_at is not None and time.monotonic() - checked_at < VERSION_CHECK_INTERVAL
+
+    async def get(self, db: AsyncSession, *names: str) -> tuple[int, ...]:
+        bind = db.bind
+        if not self._is_fresh(bind):
+            async with self._lock:
+                if not self._is_fresh(bind):
+                    rows = await db.execute(select(CacheVersion.name, CacheVersion.version))
+                    self._versions[bind] = dict(rows.all())
+                    self._checked_at[bind] = time.monotonic()
+
+        versions = self._versions[bind]
+        return tuple(versions.get(name, 0) for name in names)
+
+    def expire(self) -> None:
+        """Re-read the counters on next use; call after committing a bump."""
+        self._checked_at.clear()
+
+
+version_tracker = VersionTracker()
@@ -1,9 +1,34 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 
-from app.middleware import log_middleware
+from app.backend.db import pool_stats
+from app.backend.replica import replica_monitor
+from app.helpers.auth import password_hasher
+from app.helpers.ratings import rating_aggregator
+from app.helpers.token_cache import token_cache
+from app.metrics import mark_worker_dead, metrics_response, monitor_event_loop
+from app.middleware import access_log, log_middleware
 from app.routers import category, products, auth, permissions, review
 
-app = FastAPI(swagger_ui_parameters={'persistAuthorization': True})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_monitor = asyncio.create_task(monitor_event_loop())
+    rating_flusher = asyncio.create_task(rating_aggregator.run())
+    yield
+    for task in (loop_monitor, rating_flusher):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await rating_aggregator.flush()
+    password_hasher.shutdown()
+    access_log.close()
+    mark_worker_dead()
+
+
+app = FastAPI(lifespan=lifespan, swagger_ui_parameters={'persistAuthorization': True})
 
 app.middleware('http')(log_middleware)
 
@@ -13,6 +38,22 @@ async def welcome() -> dict:
     return {"message": "My e-commerce app"}
 
 
+@app.get("/health")
+async def health() -> dict:
+    return {
+        "status": "ok",
+        "db_pool": pool_stats(),
+        "replica": replica_monitor.stats(),
+        "ratings": rating_aggregator.stats(),
+        "token_cache": token_cache.stats(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
+
 app.include_router(category.router)
 app.include_router(products.router)
 app.include_router(auth.router)
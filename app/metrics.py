@@ -0,0 +1,107 @@
+import asyncio
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.backend.db import pool_stats
+from app.backend.query_stats import QueryStats
+
+# With several uvicorn workers every process writes its samples under this
+# directory and /metrics merges them. It must exist and be emptied before the
+# workers start (see docker-compose.prod.yml).
+PROMETHEUS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+METRICS_LOOP_INTERVAL = float(os.environ.get('METRICS_LOOP_INTERVAL', 0.5))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests by route template and status.',
+    ['method', 'route', 'status'],
+)
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time spent handling a request.',
+    ['method', 'route', 'status'], buckets=LATENCY_BUCKETS,
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL statements executed per request.',
+    ['method', 'route'], buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    'http_request_db_duration_seconds', 'Time spent in SQL statements per request.',
+    ['method', 'route'], buckets=LATENCY_BUCKETS,
+)
+POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out', 'Connections currently checked out of the pool.', ['engine'], multiprocess_mode='livesum',
+)
+POOL_OVERFLOW = Gauge(
+    'db_pool_overflow', 'Connections open beyond the pool size.', ['engine'], multiprocess_mode='livesum',
+)
+POOL_SIZE = Gauge(
+    'db_pool_size', 'Configured pool size.', ['engine'], multiprocess_mode='livesum',
+)
+LOOP_LAG = Histogram(
+    'event_loop_lag_seconds', 'How late a timer callback ran on the event loop.',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+def route_template(request: Request) -> str:
+    # Templates, not raw paths, keep label cardinality bounded.
+    route = request.scope.get('route')
+    return getattr(route, 'path', '<unmatched>')
+
+
+def observe_request(request: Request, status_code: int, duration: float, stats: QueryStats):
+    route = route_template(request)
+    status = str(status_code)
+
+    REQUESTS.labels(request.method, route, status).inc()
+    REQUEST_DURATION.labels(request.method, route, status).observe(duration)
+    REQUEST_DB_QUERIES.labels(request.method, route).observe(stats.count)
+    REQUEST_DB_DURATION.labels(request.method, route).observe(stats.duration)
+
+
+def update_pool_gauges():
+    for name, stats in pool_stats().items():
+        POOL_CHECKED_OUT.labels(name).set(stats['checked_out'])
+        POOL_OVERFLOW.labels(name).set(stats['overflow'])
+        POOL_SIZE.labels(name).set(stats['size'])
+
+
+async def monitor_event_loop():
+    """Sleep for a fixed interval and record how much later than asked we woke up."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(METRICS_LOOP_INTERVAL)
+        LOOP_LAG.observe(max(0.0, time.perf_counter() - start - METRICS_LOOP_INTERVAL))
+        update_pool_gauges()
+
+
+def metrics_response() -> Response:
+    update_pool_gauges()
+
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_dead():
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,22 +1,141 @@
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
 from uuid import uuid4
 
 from loguru import logger
 from starlette.requests import Request
 from starlette.responses import Response, JSONResponse
 
+from app.backend.query_stats import QueryStats, check_query_budget, current_query_stats
+from app.metrics import observe_request
+
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+ACCESS_LOG_PATH = os.environ.get('ACCESS_LOG_PATH', 'access.log')
+ACCESS_LOG_FLUSH_INTERVAL = float(os.environ.get('ACCESS_LOG_FLUSH_INTERVAL', 0.5))
+# Fraction of requests logged per status class, e.g. "2xx=0.1,3xx=0.1,4xx=1".
+# Unlisted classes are always logged.
+LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', '')
+
 logger.add('info.log', format='{extra[log_id]}:{time} - {level} - {message}', level='INFO', enqueue=True)
 
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,128}$')
+
+
+def _parse_sample_rates(spec: str) -> dict[int, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        status_class, rate = item.split('=')
+        rates[int(status_class.strip()[0])] = float(rate)
+    return rates
+
+
+SAMPLE_RATES = _parse_sample_rates(LOG_SAMPLE_RATES)
+
+
+class AccessLogWriter:
+    """Writes JSON access records from a background thread.
+
+    Requests only enqueue a dict; the thread serializes whatever accumulated
+    every flush interval and appends it to the file in one write.
+    """
+
+    def __init__(self, path: str, flush_interval: float):
+        self._path = path
+        self._flush_interval = flush_interval
+        self._queue: queue.SimpleQueue[dict] = queue.SimpleQueue()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def write(self, record: dict) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='access-log', daemon=True)
+                    self._thread.start()
+        self._queue.put(record)
+
+    def _drain(self, file) -> None:
+        lines = []
+        while True:
+            try:
+                lines.append(json.dumps(self._queue.get_nowait(), separators=(',', ':')))
+            except queue.Empty:
+                break
+        if lines:
+            file.write('\n'.join(lines) + '\n')
+            file.flush()
+
+    def _run(self) -> None:
+        with open(self._path, 'a', encoding='utf-8') as file:
+            while not self._stopped.wait(self._flush_interval):
+                self._drain(file)
+            self._drain(file)
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join(timeout=5)
+
+
+access_log = AccessLogWriter(ACCESS_LOG_PATH, ACCESS_LOG_FLUSH_INTERVAL)
+
+
+def _log_access(request: Request, status_code: int, duration: float, stats: QueryStats, request_id: str):
+    if random.random() >= SAMPLE_RATES.get(status_code // 100, 1.0):
+        return
+
+    if LOG_FORMAT == 'json':
+        route = request.scope.get('route')
+        access_log.write({
+            'ts': time.time(),
+            'request_id': request_id,
+            'method': request.method,
+            'path': request.url.path,
+            'route': getattr(route, 'path', None),
+            'status': status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'db_queries': stats.count,
+            'db_ms': round(stats.duration * 1000, 3),
+        })
+    elif status_code in [401, 402, 403, 404]:
+        logger.warning(f"Request to {request.url.path} failed")
+    else:
+        logger.info('Successfully accessed ' + request.url.path)
+
 
 async def log_middleware(request: Request, call_next):
-    log_id = str(uuid4())
-    with logger.contextualize(log_id=log_id):
+    request_id = request.headers.get('x-request-id')
+    if not request_id or not _REQUEST_ID.match(request_id):
+        request_id = uuid4().hex
+
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    start = time.perf_counter()
+
+    with logger.contextualize(log_id=request_id):
         try:
             response: Response = await call_next(request)
-            if response.status_code in [401, 402, 403, 404]:
-                logger.warning(f"Request to {request.url.path} failed")
-            else:
-                logger.info('Successfully accessed ' + request.url.path)
         except Exception as ex:
-            logger.error(f"Request to {request.url.path} failed: {repr(ex)}")
+            logger.opt(exception=ex).error(f"Request to {request.url.path} failed: {repr(ex)}")
             response = JSONResponse(content={"success": 'Something went wrong'}, status_code=500)
-        return response
+            duration = time.perf_counter() - start
+            observe_request(request, 500, duration, stats)
+            if LOG_FORMAT == 'json':
+                _log_access(request, 500, duration, stats, request_id)
+        else:
+            duration = time.perf_counter() - start
+            observe_request(request, response.status_code, duration, stats)
+            _log_access(request, response.status_code, duration, stats, request_id)
+        finally:
+            current_query_stats.reset(token)
+
+        check_query_budget(request, stats)
+
+    response.headers['X-Request-ID'] = request_id
+    return response
@@ -25,7 +25,7 @@ if config.config_file_name is not None:
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 from app.backend.db import Base, DATABASE_URL
-from app.models import category, products, user, review
+from app.models import category, products, user, review, cache_version
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,59 @@
+"""Add listing indexes
+
+Revision ID: 380152cc0fe5
+Revises: e1b9fc339b17
+Create Date: 2026-10-18 13:05:49.617302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '380152cc0fe5'
+down_revision: Union[str, None] = 'e1b9fc339b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LISTED = sa.text('is_active = true AND stock > 0')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_categories_id', table_name='categories')
+    op.drop_index('ix_products_id', table_name='products')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_index('ix_reviews_id', table_name='reviews')
+    op.drop_index('ix_products_rating_id', table_name='products')
+
+    op.create_index('ix_products_listed_category_id', 'products', ['category_id', 'id'],
+                    unique=False, postgresql_where=LISTED)
+    op.create_index('ix_products_listed_rating_id', 'products',
+                    [sa.text('rating DESC'), sa.text('id DESC')],
+                    unique=False, postgresql_where=LISTED)
+    op.create_index('ix_products_listed_category_rating_id', 'products',
+                    ['category_id', sa.text('rating DESC'), sa.text('id DESC')],
+                    unique=False, postgresql_where=LISTED)
+    op.create_index(op.f('ix_products_supplier_id'), 'products', ['supplier_id'], unique=False)
+    op.create_index('ix_reviews_active_product_id', 'reviews', ['product_id', 'id'],
+                    unique=False, postgresql_where=sa.text('is_active = true'))
+    op.create_index(op.f('ix_reviews_user_id'), 'reviews', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_reviews_user_id'), table_name='reviews')
+    op.drop_index('ix_reviews_active_product_id', table_name='reviews')
+    op.drop_index(op.f('ix_products_supplier_id'), table_name='products')
+    op.drop_index('ix_products_listed_category_rating_id', table_name='products')
+    op.drop_index('ix_products_listed_rating_id', table_name='products')
+    op.drop_index('ix_products_listed_category_id', table_name='products')
+
+    op.create_index('ix_products_rating_id', 'products',
+                    [sa.text('rating DESC'), sa.text('id DESC')], unique=False)
+    op.create_index(op.f('ix_reviews_id'), 'reviews', ['id'], unique=False)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_products_id'), 'products', ['id'], unique=False)
+    op.create_index(op.f('ix_categories_id'), 'categories', ['id'], unique=False)
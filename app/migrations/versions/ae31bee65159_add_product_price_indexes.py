@@ -0,0 +1,34 @@
+"""Add product price indexes
+
+Revision ID: ae31bee65159
+Revises: f0d69244c164
+Create Date: 2026-10-18 15:10:27.448150
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ae31bee65159'
+down_revision: Union[str, None] = 'f0d69244c164'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LISTED = sa.text('is_active = true AND stock > 0')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_listed_price_id', 'products', ['price', 'id'],
+                    unique=False, postgresql_where=LISTED)
+    op.create_index('ix_products_listed_category_price_id', 'products', ['category_id', 'price', 'id'],
+                    unique=False, postgresql_where=LISTED)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_listed_category_price_id', table_name='products')
+    op.drop_index('ix_products_listed_price_id', table_name='products')
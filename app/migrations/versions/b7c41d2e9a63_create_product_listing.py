@@ -0,0 +1,139 @@
+"""Create product listing
+
+Revision ID: b7c41d2e9a63
+Revises: ae31bee65159
+Create Date: 2026-10-18 18:42:05.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c41d2e9a63'
+down_revision: Union[str, None] = 'ae31bee65159'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VISIBLE = sa.text('category_active = true AND stock > 0')
+
+# Statement-level triggers with transition tables, so bulk imports and stock
+# batches sync the listing in one set-based statement rather than per row.
+# The upsert skips rows that did not change to avoid dead tuples.
+SYNC_PRODUCTS = """
+CREATE FUNCTION product_listing_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    -- Wait out concurrent category toggles so the statements below, which
+    -- take a fresh snapshot, copy the committed is_active.
+    PERFORM 1 FROM categories WHERE id IN (SELECT category_id FROM new_rows) ORDER BY id FOR SHARE;
+
+    DELETE FROM product_listing l USING new_rows n
+    WHERE l.id = n.id AND n.is_active IS NOT TRUE;
+
+    INSERT INTO product_listing
+        (id, name, slug, price, image_url, stock, rating, category_id, supplier_id, category_active)
+    SELECT n.id, n.name, n.slug, n.price, n.image_url, n.stock, n.rating, n.category_id, n.supplier_id,
+           coalesce(c.is_active, false)
+    FROM new_rows n LEFT JOIN categories c ON c.id = n.category_id
+    WHERE n.is_active
+    ON CONFLICT (id) DO UPDATE SET
+        name = excluded.name, slug = excluded.slug, price = excluded.price, image_url = excluded.image_url,
+        stock = excluded.stock, rating = excluded.rating, category_id = excluded.category_id,
+        supplier_id = excluded.supplier_id, category_active = excluded.category_active
+    WHERE (product_listing.*) IS DISTINCT FROM (excluded.*);
+
+    RETURN NULL;
+END
+$$
+"""
+
+DELETE_PRODUCTS = """
+CREATE FUNCTION product_listing_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM product_listing l USING old_rows o WHERE l.id = o.id;
+    RETURN NULL;
+END
+$$
+"""
+
+SYNC_CATEGORIES = """
+CREATE FUNCTION product_listing_category_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE product_listing l SET category_active = coalesce(n.is_active, false)
+    FROM new_rows n
+    WHERE l.category_id = n.id AND l.category_active IS DISTINCT FROM coalesce(n.is_active, false);
+
+    RETURN NULL;
+END
+$$
+"""
+
+TRIGGERS = [
+    ('product_listing_insert', 'products', 'INSERT', 'NEW TABLE AS new_rows', 'product_listing_sync'),
+    ('product_listing_update', 'products', 'UPDATE', 'NEW TABLE AS new_rows', 'product_listing_sync'),
+    ('product_listing_delete', 'products', 'DELETE', 'OLD TABLE AS old_rows', 'product_listing_delete'),
+    ('product_listing_category_update', 'categories', 'UPDATE', 'NEW TABLE AS new_rows',
+     'product_listing_category_sync'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'product_listing',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=True),
+        sa.Column('slug', sa.String(length=100), nullable=True),
+        sa.Column('price', sa.Integer(), nullable=True),
+        sa.Column('image_url', sa.String(), nullable=True),
+        sa.Column('stock', sa.Integer(), nullable=True),
+        sa.Column('rating', sa.Float(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('supplier_id', sa.Integer(), nullable=True),
+        sa.Column('category_active', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    op.execute(SYNC_PRODUCTS)
+    op.execute(DELETE_PRODUCTS)
+    op.execute(SYNC_CATEGORIES)
+    for name, table, event, transition, function in TRIGGERS:
+        op.execute(
+            f'CREATE TRIGGER {name} AFTER {event} ON {table} REFERENCING {transition} '
+            f'FOR EACH STATEMENT EXECUTE FUNCTION {function}()'
+        )
+
+    op.execute("""
+        INSERT INTO product_listing
+            (id, name, slug, price, image_url, stock, rating, category_id, supplier_id, category_active)
+        SELECT p.id, p.name, p.slug, p.price, p.image_url, p.stock, p.rating, p.category_id, p.supplier_id,
+               coalesce(c.is_active, false)
+        FROM products p LEFT JOIN categories c ON c.id = p.category_id
+        WHERE p.is_active
+    """)
+
+    op.create_index('ix_product_listing_category_id', 'product_listing', ['category_id', 'id'], unique=False)
+    op.create_index('ix_product_listing_visible_id', 'product_listing', ['id'],
+                    unique=False, postgresql_where=VISIBLE)
+    op.create_index('ix_product_listing_visible_rating_id', 'product_listing',
+                    [sa.text('rating DESC'), sa.text('id DESC')], unique=False, postgresql_where=VISIBLE)
+    op.create_index('ix_product_listing_visible_price_id', 'product_listing', ['price', 'id'],
+                    unique=False, postgresql_where=VISIBLE)
+    op.create_index('ix_product_listing_visible_category_rating_id', 'product_listing',
+                    ['category_id', sa.text('rating DESC'), sa.text('id DESC')],
+                    unique=False, postgresql_where=VISIBLE)
+    op.create_index('ix_product_listing_visible_category_price_id', 'product_listing',
+                    ['category_id', 'price', 'id'], unique=False, postgresql_where=VISIBLE)
+    op.execute('ANALYZE product_listing')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, *_ in TRIGGERS:
+        op.execute(f'DROP TRIGGER {name} ON {table}')
+    op.execute('DROP FUNCTION product_listing_category_sync()')
+    op.execute('DROP FUNCTION product_listing_delete()')
+    op.execute('DROP FUNCTION product_listing_sync()')
+    op.drop_table('product_listing')
@@ -0,0 +1,31 @@
+"""Add user tokens_valid_after
+
+Revision ID: c5e8a1f0b2d4
+Revises: b7c41d2e9a63
+Create Date: 2026-10-18 20:02:41.907311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8a1f0b2d4'
+down_revision: Union[str, None] = 'b7c41d2e9a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('tokens_valid_after', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_users_tokens_valid_after', 'users', ['tokens_valid_after'],
+                    unique=False, postgresql_where=sa.text('tokens_valid_after IS NOT NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_tokens_valid_after', table_name='users')
+    op.drop_column('users', 'tokens_valid_after')
@@ -0,0 +1,35 @@
+"""Seed cache versions
+
+Revision ID: d3f7b9c2e6a1
+Revises: c5e8a1f0b2d4
+Create Date: 2026-10-18 20:14:09.552870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f7b9c2e6a1'
+down_revision: Union[str, None] = 'c5e8a1f0b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# bump_version only updates existing rows, so every tag needs one up front.
+NAMES = ('categories', 'products', 'reviews')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        sa.text(
+            'INSERT INTO cache_versions (name, version) SELECT unnest(CAST(:names AS varchar[])), 0 '
+            'ON CONFLICT (name) DO NOTHING'
+        ).bindparams(names=list(NAMES))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
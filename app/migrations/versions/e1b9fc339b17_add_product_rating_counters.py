@@ -0,0 +1,43 @@
+"""Add product rating counters
+
+Revision ID: e1b9fc339b17
+Revises: 522b33a5987c
+Create Date: 2026-10-18 11:40:05.214773
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b9fc339b17'
+down_revision: Union[str, None] = '522b33a5987c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('rating_sum', sa.Float(), server_default='0', nullable=False))
+    op.add_column('products', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE products
+        SET rating_sum = totals.grade_sum,
+            rating_count = totals.grade_count,
+            rating = round((totals.grade_sum / totals.grade_count)::numeric, 2)
+        FROM (
+            SELECT product_id, sum(grade) AS grade_sum, count(*) AS grade_count
+            FROM reviews
+            WHERE is_active = true AND grade IS NOT NULL
+            GROUP BY product_id
+        ) AS totals
+        WHERE products.id = totals.product_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'rating_count')
+    op.drop_column('products', 'rating_sum')
@@ -0,0 +1,45 @@
+"""Restrict price indexes to priced rows
+
+Revision ID: e2a4c6d8f0b3
+Revises: d3f7b9c2e6a1
+Create Date: 2026-10-18 20:27:51.180442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a4c6d8f0b3'
+down_revision: Union[str, None] = 'd3f7b9c2e6a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VISIBLE = 'category_active = true AND stock > 0'
+PRICED = f'{VISIBLE} AND price IS NOT NULL'
+
+
+def create_price_indexes(predicate: str) -> None:
+    op.create_index('ix_product_listing_visible_price_id', 'product_listing', ['price', 'id'],
+                    unique=False, postgresql_where=sa.text(predicate))
+    op.create_index('ix_product_listing_visible_category_price_id', 'product_listing',
+                    ['category_id', 'price', 'id'], unique=False, postgresql_where=sa.text(predicate))
+
+
+def drop_price_indexes() -> None:
+    op.drop_index('ix_product_listing_visible_category_price_id', table_name='product_listing')
+    op.drop_index('ix_product_listing_visible_price_id', table_name='product_listing')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    drop_price_indexes()
+    create_price_indexes(PRICED)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_price_indexes()
+    create_price_indexes(VISIBLE)
@@ -0,0 +1,44 @@
+"""Add product search
+
+Revision ID: f0d69244c164
+Revises: 380152cc0fe5
+Create Date: 2026-10-18 14:21:33.092671
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f0d69244c164'
+down_revision: Union[str, None] = '380152cc0fe5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+        persisted=True,
+    ), nullable=True))
+    op.create_index('ix_products_search_vector', 'products', ['search_vector'],
+                    unique=False, postgresql_using='gin')
+
+    # pg_trgm ships with contrib; skip the fuzzy index where it isn't installed.
+    bind = op.get_bind()
+    if bind.scalar(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")):
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_products_name_trgm', 'products', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP INDEX IF EXISTS ix_products_name_trgm')
+    op.drop_index('ix_products_search_vector', table_name='products')
+    op.drop_column('products', 'search_vector')
@@ -0,0 +1,28 @@
+"""Add user token_generation
+
+Revision ID: f4c8e2a6b1d7
+Revises: e2a4c6d8f0b3
+Create Date: 2026-10-18 20:24:13.518402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c8e2a6b1d7'
+down_revision: Union[str, None] = 'e2a4c6d8f0b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_generation', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_generation')
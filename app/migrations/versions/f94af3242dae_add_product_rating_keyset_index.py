@@ -0,0 +1,38 @@
+"""Add product rating keyset index
+
+Revision ID: f94af3242dae
+Revises: 8203be6f4644
+Create Date: 2026-10-18 10:12:41.503221
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f94af3242dae'
+down_revision: Union[str, None] = '8203be6f4644'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('UPDATE products SET rating = 0 WHERE rating IS NULL')
+    op.alter_column('products', 'rating',
+               existing_type=sa.Float(),
+               server_default='0',
+               nullable=False)
+    op.create_index('ix_products_rating_id', 'products',
+                    [sa.text('rating DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_rating_id', table_name='products')
+    op.alter_column('products', 'rating',
+               existing_type=sa.Float(),
+               server_default=None,
+               nullable=True)
@@ -1,4 +1,6 @@
 from .category import Category
-from .products import Product
+from .products import Product, PRODUCT_LISTED
+from .product_listing import ProductListing, LISTING_IN_STOCK, LISTING_VISIBLE
 from .user import User
 from .review import Review
+from .cache_version import CacheVersion
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, BigInteger
+
+from app.backend.db import Base
+
+
+class CacheVersion(Base):
+    __tablename__ = 'cache_versions'
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0, server_default='0')
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, Index, literal_column
+
+from app.backend.db import Base
+
+
+class ProductListing(Base):
+    """Slim copy of active products for the listing routes.
+
+    Kept in step with products and categories by triggers (see migration
+    b7c41d2e9a63) inside the writing transaction; never write to it directly.
+    """
+    __tablename__ = 'product_listing'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(100))
+    slug = Column(String(100))
+    price = Column(Integer)
+    image_url = Column(String)
+    stock = Column(Integer)
+    rating = Column(Float, nullable=False)
+    category_id = Column(Integer)
+    supplier_id = Column(Integer)
+    category_active = Column(Boolean, nullable=False)
+
+
+# Literal for the same reason as PRODUCT_LISTED: the partial indexes must match.
+LISTING_IN_STOCK = ProductListing.stock > literal_column('0')
+LISTING_VISIBLE = (ProductListing.category_active == True) & LISTING_IN_STOCK
+# Price sorts skip unpriced rows (see apply_keyset).
+LISTING_PRICED = LISTING_VISIBLE & ProductListing.price.is_not(None)
+
+Index('ix_product_listing_category_id', ProductListing.category_id, ProductListing.id)
+Index('ix_product_listing_visible_id', ProductListing.id,
+      postgresql_where=LISTING_VISIBLE)
+Index('ix_product_listing_visible_rating_id', ProductListing.rating.desc(), ProductListing.id.desc(),
+      postgresql_where=LISTING_VISIBLE)
+Index('ix_product_listing_visible_price_id', ProductListing.price, ProductListing.id,
+      postgresql_where=LISTING_PRICED)
+Index('ix_product_listing_visible_category_rating_id',
+      ProductListing.category_id, ProductListing.rating.desc(), ProductListing.id.desc(),
+      postgresql_where=LISTING_VISIBLE)
+Index('ix_product_listing_visible_category_price_id',
+      ProductListing.category_id, ProductListing.price, ProductListing.id,
+      postgresql_where=LISTING_PRICED)
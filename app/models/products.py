@@ -1,13 +1,18 @@
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, Integer, String, Text, Float, Boolean, ForeignKey, Index, Computed, and_, literal_column
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 
 from app.backend.db import Base
 
+SEARCH_CONFIG = 'simple'
+
 
 class Product(Base):
     __tablename__ = 'products'
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(100))
     slug = Column(String(100), unique=True, index=True)
     description = Column(Text)
@@ -15,10 +20,35 @@ class Product(Base):
     image_url = Column(String)
     stock = Column(Integer)
     category_id = Column(Integer, ForeignKey('categories.id'))
-    supplier_id = Column(Integer, ForeignKey('users.id'), nullable=True)
-    rating = Column(Float, default=0.0)
+    supplier_id = Column(Integer, ForeignKey('users.id'), nullable=True, index=True)
+    rating = Column(Float, default=0.0, server_default='0', nullable=False)
+    rating_sum = Column(Float, default=0.0, server_default='0', nullable=False)
+    rating_count = Column(Integer, default=0, server_default='0', nullable=False)
     is_active = Column(Boolean, default=True)
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+        persisted=True,
+    )))
 
     category = relationship('Category', back_populates='products')
     supplier = relationship('User', back_populates='products')
     reviews = relationship('Review', back_populates='product')
+
+
+# Rendered with literals rather than bound parameters so the planner can match
+# it against the predicate of the partial listing indexes below.
+PRODUCT_LISTED = and_(Product.is_active == True, Product.stock > literal_column('0'))
+
+Index('ix_products_listed_category_id', Product.category_id, Product.id,
+      postgresql_where=PRODUCT_LISTED)
+Index('ix_products_listed_rating_id', Product.rating.desc(), Product.id.desc(),
+      postgresql_where=PRODUCT_LISTED)
+Index('ix_products_listed_category_rating_id', Product.category_id, Product.rating.desc(), Product.id.desc(),
+      postgresql_where=PRODUCT_LISTED)
+Index('ix_products_listed_price_id', Product.price, Product.id,
+      postgresql_where=PRODUCT_LISTED)
+Index('ix_products_listed_category_price_id', Product.category_id, Product.price, Product.id,
+      postgresql_where=PRODUCT_LISTED)
+Index('ix_products_search_vector', Product.search_vector, postgresql_using='gin')
+Index('ix_products_name_trgm', Product.name, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
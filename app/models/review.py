@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, Float, Boolean, ForeignKey, Date
+from sqlalchemy import Column, Integer, Text, Float, Boolean, ForeignKey, Date, Index
 from sqlalchemy.orm import relationship
 
 from app.backend.db import Base
@@ -7,8 +7,8 @@ from app.backend.db import Base
 class Review(Base):
     __tablename__ = 'reviews'
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey('users.id'))
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
     product_id = Column(Integer, ForeignKey('products.id'))
     comment = Column(Text, nullable=True)
     comment_date = Column(Date)
@@ -17,3 +17,7 @@ class Review(Base):
 
     customer = relationship('User', back_populates='reviews')
     product = relationship('Product', back_populates='reviews')
+
+
+Index('ix_reviews_active_product_id', Review.product_id, Review.id,
+      postgresql_where=Review.is_active == True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from app.backend.db import Base
@@ -7,7 +7,7 @@ from app.backend.db import Base
 class User(Base):
     __tablename__ = 'users'
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     first_name = Column(String)
     last_name = Column(String)
     username = Column(String, unique=True)
@@ -17,6 +17,15 @@ class User(Base):
     is_admin = Column(Boolean, default=False)
     is_supplier = Column(Boolean, default=False)
     is_customer = Column(Boolean, default=True)
+    # Bumped on every permission change; tokens carry the generation they
+    # were issued at and older ones are rejected.
+    token_generation = Column(Integer, default=0, server_default='0', nullable=False)
+    # When the generation last changed, so workers only load recent changes.
+    tokens_valid_after = Column(DateTime(timezone=True), nullable=True)
 
     products = relationship('Product', back_populates='supplier')
     reviews = relationship('Review', back_populates='customer')
+
+
+Index('ix_users_tokens_valid_after', User.tokens_valid_after,
+      postgresql_where=User.tokens_valid_after.is_not(None))
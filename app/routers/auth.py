@@ -7,10 +7,11 @@ from sqlalchemy import insert
 
 from app.backend.db_depends import DbSessionDep
 from app.helpers.auth import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
     get_current_user_payload,
     authenticate_user,
     create_access_token,
-    bcrypt_context,
+    password_hasher,
 )
 from app.models import User
 from app.schemas import CreateUser
@@ -28,7 +29,8 @@ async def login(db: DbSessionDep, form_data: Annotated[OAuth2PasswordRequestForm
         user.is_admin,
         user.is_supplier,
         user.is_customer,
-        expires_delta=timedelta(minutes=20),
+        user.token_generation,
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     )
 
     return {"access_token": token, "token_type": "bearer"}
@@ -42,7 +44,7 @@ async def create_user(db: DbSessionDep, new_user: CreateUser):
             last_name=new_user.last_name,
             username=new_user.username,
             email=new_user.email,
-            hashed_password=bcrypt_context.hash(new_user.password),
+            hashed_password=await password_hasher.hash(new_user.password),
         )
     )
 
@@ -59,7 +61,7 @@ async def create_superuser(db: DbSessionDep, new_user: CreateUser):
             last_name=new_user.last_name,
             username=new_user.username,
             email=new_user.email,
-            hashed_password=bcrypt_context.hash(new_user.password),
+            hashed_password=await password_hasher.hash(new_user.password),
             is_admin=True,
         )
     )
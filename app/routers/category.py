@@ -1,21 +1,25 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi import status
 from slugify import slugify
-from sqlalchemy import insert, select
+from sqlalchemy import insert, select, update
 
-from app.backend.db_depends import DbSessionDep
+from app.backend.db_depends import DbSessionDep, ReadDbSessionDep
 from app.helpers.auth import CurrUserPayloadDep, user_is_admin
+from app.helpers.category import category_cache
+from app.helpers.response_cache import cached_response
 from app.helpers.review import get_object_or_404
+from app.helpers.versions import CATEGORIES, bump_version
 from app.models import Category
-from app.schemas import CreateCategory
+from app.schemas import CategoryOut, CreateCategory
 
 router = APIRouter(prefix="/categories", tags=["category"])
 
 
 @router.get("/")
-async def get_all_categories(db: DbSessionDep):
-    categories = await db.scalars(select(Category).where(Category.is_active == True))
-    return categories.all()
+@cached_response(CATEGORIES)
+async def get_all_categories(request: Request, db: ReadDbSessionDep) -> list[CategoryOut]:
+    tree = await category_cache.get(db)
+    return tree.active()
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
@@ -29,7 +33,8 @@ async def create_category(
         )
     )
 
-    await db.rollback()
+    await db.commit()
+    await bump_version(db, CATEGORIES)
 
     return {"status_code": status.HTTP_201_CREATED, "transaction": "Successful"}
 
@@ -51,6 +56,7 @@ async def update_category(
     category.parent_id = update_category.parent_id
 
     await db.commit()
+    await bump_version(db, CATEGORIES)
 
     return {"status_code": status.HTTP_200_OK, "transaction": "Category update is successful"}
 
@@ -58,14 +64,16 @@ async def update_category(
 @router.delete("/{category_slug}")
 @user_is_admin
 async def delete_category(db: DbSessionDep, category_slug: str, curr_user: CurrUserPayloadDep):
-    category = await get_object_or_404(
+    await get_object_or_404(
         db,
-        select(Category).where(Category.slug == category_slug, Category.is_active == True),
+        update(Category)
+        .where(Category.slug == category_slug, Category.is_active == True)
+        .values(is_active=False)
+        .returning(Category.id),
         "There is no such category",
     )
 
-    category.is_active = False
-
     await db.commit()
+    await bump_version(db, CATEGORIES)
 
     return {"status_code": status.HTTP_200_OK, "transaction": "Category delete is successful"}
@@ -1,27 +1,39 @@
 from fastapi import APIRouter
+from sqlalchemy import func, update
 from starlette import status
 
 from app.backend.db_depends import DbSessionDep
-from app.helpers.auth import CurrUserPayloadDep, user_is_admin, get_user
+from app.helpers.auth import CurrUserPayloadDep, token_revocations, user_is_admin
+from app.helpers.review import get_object_or_404
+from app.models import User
 
 router = APIRouter(prefix="/permission", tags=["permission"])
 
 
+def update_active_user(user_id: int):
+    # Tokens carry the role claims, so every change invalidates the ones issued so far.
+    return (
+        update(User)
+        .where(User.id == user_id, User.is_active == True)
+        .values(token_generation=User.token_generation + 1, tokens_valid_after=func.now())
+    )
+
+
 @router.patch("/supplier")
 @user_is_admin
 async def toggle_supplier_permission(
     db: DbSessionDep, curr_user: CurrUserPayloadDep, user_id: int
 ):
-    user = await get_user(db, user_id)
-
-    if user.is_supplier:
-        user.is_supplier = False
-        detail = "User is no longer supplier"
-    else:
-        user.is_supplier = True
-        detail = "User is now supplier"
+    is_supplier = await get_object_or_404(
+        db,
+        update_active_user(user_id).values(is_supplier=User.is_supplier.is_not(True)).returning(User.is_supplier),
+        "User not found",
+    )
 
     await db.commit()
+    token_revocations.expire()
+
+    detail = "User is now supplier" if is_supplier else "User is no longer supplier"
     return {"status_code": status.HTTP_200_OK, "detail": detail}
 
 
@@ -30,25 +42,29 @@ async def toggle_supplier_permission(
 async def toggle_customer_permission(
     db: DbSessionDep, curr_user: CurrUserPayloadDep, user_id: int
 ):
-    user = await get_user(db, user_id)
-
-    if user.is_customer:
-        user.is_customer = False
-        detail = "User is no longer customer"
-    else:
-        user.is_customer = True
-        detail = "User is now customer"
+    is_customer = await get_object_or_404(
+        db,
+        update_active_user(user_id).values(is_customer=User.is_customer.is_not(True)).returning(User.is_customer),
+        "User not found",
+    )
 
     await db.commit()
+    token_revocations.expire()
+
+    detail = "User is now customer" if is_customer else "User is no longer customer"
     return {"status_code": status.HTTP_200_OK, "detail": detail}
 
 
 @router.delete("/delete")
 @user_is_admin
 async def delete_user(db: DbSessionDep, curr_user: CurrUserPayloadDep, user_id: int):
-    user = await get_user(db, user_id)
+    await get_object_or_404(
+        db,
+        update_active_user(user_id).values(is_active=False).returning(User.id),
+        "User not found",
+    )
 
-    user.is_active = False
     await db.commit()
+    token_revocations.expire()
 
     return {"status_code": status.HTTP_200_OK, "detail": "User is deleted"}
@@ -1,29 +1,137 @@
-from fastapi import APIRouter, status, HTTPException
+import os
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Body, Depends, status, HTTPException, Query, Request
 from slugify import slugify
-from sqlalchemy import insert, select
+from sqlalchemy import Float, Select, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import DbSessionDep
+from app.backend.db_depends import DbSessionDep, ReadDbSessionDep
+from app.backend.query_stats import query_budget
 from app.helpers.auth import CurrUserPayloadDep, user_is_supplier
-from app.helpers.review import get_objects_or_404, get_object_or_404
-from app.models import Product, Category
-from app.schemas import CreateProduct
+from app.helpers.bulk import apply_stock_updates, import_products
+from app.helpers.category import category_cache
+from app.helpers.export import FormatParam, ndjson_response
+from app.helpers.facets import product_facets
+from app.helpers.pagination import (
+    DEFAULT_PAGE_SIZE,
+    KeysetSort,
+    LimitParam,
+    apply_keyset,
+    build_page,
+)
+from app.helpers.response_cache import cached_response
+from app.helpers.review import get_row_or_404, get_rows_or_404
+from app.helpers.serializers import model_columns
+from app.helpers.versions import CATEGORIES, PRODUCTS, bump_version
+from app.models import Category, Product, ProductListing, PRODUCT_LISTED, LISTING_IN_STOCK
+from app.models.products import SEARCH_CONFIG
+from app.schemas import (
+    CreateProduct,
+    Page,
+    ProductDetail,
+    ProductFilters,
+    ProductListItem,
+    ProductPage,
+    ProductSearchItem,
+    StockUpdate,
+)
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+STOCK_BATCH_MAX = int(os.environ.get("STOCK_BATCH_MAX", 5000))
+SEARCH_TRIGRAM_ENABLED = os.environ.get("SEARCH_TRIGRAM_ENABLED", "false").lower() in ("1", "true", "yes")
+
+PRODUCT_SORTS = {
+    "id": KeysetSort("id", (ProductListing.id,)),
+    "newest": KeysetSort("newest", (ProductListing.id,), descending=True),
+    "rating": KeysetSort("rating", (ProductListing.rating, ProductListing.id), descending=True),
+    "price": KeysetSort("price", (ProductListing.price, ProductListing.id)),
+    "price_desc": KeysetSort("price_desc", (ProductListing.price, ProductListing.id), descending=True),
+}
+
+EXPORT_COLUMNS = [col for col in Product.__table__.columns if col.key != "search_vector"]
+# Listings read the trigger-maintained product_listing table; search needs
+# the tsvector and stays on products.
+LIST_COLUMNS = model_columns(ProductListing, ProductListItem)
+SEARCH_COLUMNS = model_columns(Product, ProductListItem)
+DETAIL_COLUMNS = model_columns(Product, ProductDetail)
+
+SortParam = Annotated[Literal["id", "newest", "rating", "price", "price_desc"], Query()]
+
+
+def product_filters(
+    min_price: Annotated[int | None, Query(ge=0)] = None,
+    max_price: Annotated[int | None, Query(ge=0)] = None,
+    min_rating: Annotated[float | None, Query(ge=0, le=10)] = None,
+    supplier: int | None = None,
+    in_stock: bool = True,
+    facets: bool = False,
+) -> ProductFilters:
+    return ProductFilters(
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+        supplier=supplier,
+        in_stock=in_stock,
+        facets=facets,
+    )
+
+
+FiltersParam = Annotated[ProductFilters, Depends(product_filters)]
+
+
+def filter_products(query: Select, filters: ProductFilters) -> Select:
+    # product_listing only holds active products.
+    if filters.in_stock:
+        query = query.where(LISTING_IN_STOCK)
+
+    if filters.min_price is not None:
+        query = query.where(ProductListing.price >= filters.min_price)
+    if filters.max_price is not None:
+        query = query.where(ProductListing.price <= filters.max_price)
+    if filters.min_rating is not None:
+        query = query.where(ProductListing.rating >= filters.min_rating)
+    if filters.supplier is not None:
+        query = query.where(ProductListing.supplier_id == filters.supplier)
+
+    return query
+
+
+async def with_facets(db: AsyncSession, page: dict, query: Select, filters: ProductFilters) -> dict:
+    if filters.facets:
+        page["facets"] = await product_facets(db, query)
+    return page
+
 
 @router.get("/")
-async def get_all_products(db: DbSessionDep):
-    products = await get_objects_or_404(
-        db,
-        select(Product)
-        .join(Category)
-        .where(
-            Product.is_active == True, Category.is_active == True, Product.stock > 0
-        ),
-        "There are no products",
+@cached_response(PRODUCTS, CATEGORIES)
+async def get_all_products(
+    request: Request,
+    db: ReadDbSessionDep,
+    filters: FiltersParam,
+    cursor: str | None = None,
+    limit: LimitParam = DEFAULT_PAGE_SIZE,
+    sort: SortParam = "id",
+    format: FormatParam = "json",
+) -> ProductPage:
+    query = filter_products(
+        select(*LIST_COLUMNS).where(ProductListing.category_active == True), filters
     )
 
-    return products
+    if format == "ndjson":
+        return ndjson_response(
+            query.with_only_columns(*EXPORT_COLUMNS)
+            .join_from(ProductListing, Product, Product.id == ProductListing.id)
+            .order_by(Product.id)
+        )
+
+    keyset = PRODUCT_SORTS[sort]
+    products = await get_rows_or_404(
+        db, apply_keyset(query, keyset, cursor, limit), "There are no products"
+    )
+
+    return await with_facets(db, build_page(products, keyset, limit), query, filters)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
@@ -31,11 +139,13 @@ async def get_all_products(db: DbSessionDep):
 async def create_product(
     db: DbSessionDep, product: CreateProduct, curr_user: CurrUserPayloadDep
 ):
-    category: Category = await get_object_or_404(
-        db,
-        select(Category).where(Category.id == product.category),
-        "There is no such category",
-    )
+    tree = await category_cache.get(db)
+    category = tree.by_id.get(product.category)
+
+    if category is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="There is no such category"
+        )
 
     await db.execute(
         insert(Product).values(
@@ -50,6 +160,7 @@ async def create_product(
         )
     )
     await db.commit()
+    await bump_version(db, PRODUCTS)
 
     return {
         "status_code": status.HTTP_201_CREATED,
@@ -57,43 +168,111 @@ async def create_product(
     }
 
 
-@router.get("/{category_slug}")
-async def product_by_category(db: DbSessionDep, category_slug: str):
-    category: Category = await get_object_or_404(
-        db,
-        select(Category).where(
-            Category.slug == category_slug, Category.is_active == True
-        ),
-        "There is no such category",
-    )
+@router.post("/bulk")
+@user_is_supplier
+async def bulk_upsert_products(
+    request: Request, db: DbSessionDep, curr_user: CurrUserPayloadDep
+):
+    return await import_products(db, request, curr_user.get("id"))
 
-    subcategories = await db.scalars(
-        select(Category).where(
-            Category.parent_id == category.id, Category.is_active == True
-        )
+
+@router.patch("/stock")
+@user_is_supplier
+async def update_stock(
+    db: DbSessionDep,
+    updates: Annotated[list[StockUpdate], Body(min_length=1, max_length=STOCK_BATCH_MAX)],
+    curr_user: CurrUserPayloadDep,
+):
+    supplier_id = None if curr_user.get("is_admin") else curr_user.get("id")
+    return await apply_stock_updates(db, updates, supplier_id)
+
+
+@router.get("/search")
+@cached_response(PRODUCTS, CATEGORIES)
+async def search_products(
+    request: Request,
+    db: ReadDbSessionDep,
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    category: str | None = None,
+    fuzzy: bool = False,
+    cursor: str | None = None,
+    limit: LimitParam = DEFAULT_PAGE_SIZE,
+) -> Page[ProductSearchItem]:
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    condition = Product.search_vector.op("@@")(tsquery)
+    rank = func.ts_rank_cd(Product.search_vector, tsquery, type_=Float)
+
+    if fuzzy:
+        if not SEARCH_TRIGRAM_ENABLED:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Fuzzy search is not enabled",
+            )
+        condition = or_(condition, Product.name.op("%")(q))
+        rank = func.greatest(rank, func.similarity(Product.name, q), type_=Float)
+
+    rank = rank.label("rank")
+    query = (
+        select(*SEARCH_COLUMNS, rank)
+        .join(Category, Category.id == Product.category_id)
+        .where(condition, PRODUCT_LISTED, Category.is_active == True)
     )
 
-    cat_ids = [category.id] + [cat.id for cat in subcategories.all()]
+    if category is not None:
+        tree = await category_cache.get(db)
+        cat_ids = tree.active_subtree(category)
+        if cat_ids is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="There is no such category"
+            )
+        query = query.where(Product.category_id.in_(cat_ids))
 
-    products = await db.scalars(
-        select(Product).where(
-            Product.category_id.in_(cat_ids),
-            Product.is_active == True,
-            Product.stock > 0,
+    keyset = KeysetSort("rank", (rank, Product.id), descending=True)
+    rows = await db.execute(apply_keyset(query, keyset, cursor, limit))
+
+    return build_page(rows.all(), keyset, limit)
+
+
+@router.get("/{category_slug}")
+@query_budget(4)
+@cached_response(PRODUCTS, CATEGORIES)
+async def product_by_category(
+    request: Request,
+    db: ReadDbSessionDep,
+    category_slug: str,
+    filters: FiltersParam,
+    cursor: str | None = None,
+    limit: LimitParam = DEFAULT_PAGE_SIZE,
+    sort: SortParam = "id",
+) -> ProductPage:
+    tree = await category_cache.get(db)
+    cat_ids = tree.active_subtree(category_slug)
+
+    if cat_ids is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="There is no such category"
         )
+
+    # Redundant with the active subtree, but lets the visible-row indexes match.
+    query = filter_products(
+        select(*LIST_COLUMNS).where(ProductListing.category_active == True, ProductListing.category_id.in_(cat_ids)),
+        filters,
     )
 
-    return products.all()
+    keyset = PRODUCT_SORTS[sort]
+    products = await db.execute(apply_keyset(query, keyset, cursor, limit))
+
+    return await with_facets(db, build_page(products.all(), keyset, limit), query, filters)
 
 
 @router.get("/detail/{product_slug}")
-async def product_detail(db: DbSessionDep, product_slug: str):
-    product: Product = await get_object_or_404(
+@cached_response(PRODUCTS)
+async def product_detail(request: Request, db: ReadDbSessionDep, product_slug: str) -> ProductDetail:
+    product = await get_row_or_404(
         db,
-        select(Product).where(
+        select(*DETAIL_COLUMNS).where(
             Product.slug == product_slug,
-            Product.is_active == True,
-            Product.stock > 0,
+            PRODUCT_LISTED,
         ),
         "There is no product found",
     )
@@ -101,7 +280,23 @@ async def product_detail(db: DbSessionDep, product_slug: str):
     return product
 
 
+async def product_write_error(db: AsyncSession, *conditions) -> HTTPException:
+    """Explain why a guarded product UPDATE matched nothing; only runs on failure."""
+    product_id = await db.scalar(select(Product.id).where(*conditions))
+
+    if product_id is None:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="There is no product found"
+        )
+
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="You are not authorized to use this method",
+    )
+
+
 @router.put("/{product_slug}")
+@query_budget(4)
 @user_is_supplier
 async def update_product(
     db: DbSessionDep,
@@ -109,35 +304,34 @@ async def update_product(
     new_product: CreateProduct,
     curr_user: CurrUserPayloadDep,
 ):
-    product: Product = await get_object_or_404(
-        db,
-        select(Product).where(Product.slug == product_slug),
-        "There is no product found",
-    )
+    tree = await category_cache.get(db)
+    category = tree.get_active(new_product.category)
 
-    if product.supplier_id != curr_user.get("id"):
+    if category is None:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not authorized to use this method",
+            status_code=status.HTTP_404_NOT_FOUND, detail="There is no such category"
         )
 
-    category = await get_object_or_404(
-        db,
-        select(Category).where(
-            Category.slug == new_product.category, Category.is_active == True
-        ),
-        "There is no such category",
+    product_id = await db.scalar(
+        update(Product)
+        .where(Product.slug == product_slug, Product.supplier_id == curr_user.get("id"))
+        .values(
+            name=new_product.name,
+            slug=slugify(new_product.name),
+            description=new_product.description,
+            price=new_product.price,
+            image_url=new_product.image_url,
+            stock=new_product.stock,
+            category_id=category.id,
+        )
+        .returning(Product.id)
     )
 
-    product.name = (new_product.name,)
-    product.slug = (slugify(new_product.name),)
-    product.description = (new_product.description,)
-    product.price = (new_product.price,)
-    product.image_url = (new_product.image_url,)
-    product.stock = (new_product.stock,)
-    product.category_id = (category.id,)
+    if product_id is None:
+        raise await product_write_error(db, Product.slug == product_slug)
 
     await db.commit()
+    await bump_version(db, PRODUCTS)
 
     return {
         "status_code": status.HTTP_200_OK,
@@ -150,21 +344,24 @@ async def update_product(
 async def delete_product(
     db: DbSessionDep, product_slug: str, curr_user: CurrUserPayloadDep
 ):
-    product = await get_object_or_404(
-        db,
-        select(Product).where(Product.slug == product_slug, Product.is_active == True),
-        "There is no product found",
+    product_id = await db.scalar(
+        update(Product)
+        .where(
+            Product.slug == product_slug,
+            Product.is_active == True,
+            Product.supplier_id == curr_user.get("id"),
+        )
+        .values(is_active=False)
+        .returning(Product.id)
     )
 
-    if product.supplier_id != curr_user.get("id"):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not authorized to use this method",
+    if product_id is None:
+        raise await product_write_error(
+            db, Product.slug == product_slug, Product.is_active == True
         )
 
-    product.is_active = False
-
     await db.commit()
+    await bump_version(db, PRODUCTS)
 
     return {
         "status_code": status.HTTP_200_OK,
@@ -1,84 +1,156 @@
 from datetime import datetime
 
-from fastapi import APIRouter
-from sqlalchemy import select, ScalarResult, insert, Sequence
+from fastapi import APIRouter, HTTPException, Request
+from sqlalchemy import Select, select, ScalarResult, insert, Sequence, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, load_only
 from starlette import status
 
-from app.backend.db_depends import DbSessionDep
+from app.backend.db_depends import DbSessionDep, ReadDbSessionDep, release_connection
+from app.backend.query_stats import query_budget
 from app.helpers.auth import CurrUserPayloadDep, user_is_customer, user_is_admin
-from app.helpers.review import calculate_rating, get_object_or_404, get_objects_or_404
+from app.helpers.export import FormatParam, ndjson_response
+from app.helpers.pagination import DEFAULT_PAGE_SIZE, KeysetSort, LimitParam, apply_keyset, build_page
+from app.helpers.ratings import rating_aggregator
+from app.helpers.response_cache import cached_response
+from app.helpers.review import (
+    apply_rating_delta,
+    get_object_or_404,
+    get_objects_or_404,
+    get_rows_or_404,
+    grade_histograms,
+)
+from app.helpers.serializers import model_columns
+from app.helpers.versions import PRODUCTS, REVIEWS, bump_version
 from app.models import Review, Product, User
-from app.schemas import CreateReview
+from app.schemas import CreateReview, ReviewOut, ReviewPage
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
+REVIEW_COLUMNS = model_columns(Review, ReviewOut)
+REVIEW_SORT = KeysetSort("id", (Review.id,))
 
-@router.get("/")
-async def get_all_reviews(db: DbSessionDep):
-    reviews = await get_objects_or_404(
-        db,
+
+def listed_reviews(expand: bool) -> Select:
+    query = (
         select(Review)
-        .join(Product)
-        .join(User)
-        .where(Review.is_active == True, Product.is_active == True, User.is_active == True),
-        "There is no reviews found",
+        .join(Review.product)
+        .join(Review.customer)
+        .where(Review.is_active == True, Product.is_active == True, User.is_active == True)
+    )
+
+    if not expand:
+        return query.with_only_columns(*REVIEW_COLUMNS)
+
+    # One joined query; the related rows are populated from the same result.
+    return query.options(
+        load_only(*REVIEW_COLUMNS),
+        contains_eager(Review.product).load_only(Product.id, Product.name, Product.slug),
+        contains_eager(Review.customer).load_only(User.id, User.first_name),
     )
-    return reviews
+
+
+async def review_page(
+    db: AsyncSession, query: Select, expand: bool, histogram: bool, cursor: str | None, limit: int, error_message: str
+) -> dict:
+    fetch = get_objects_or_404 if expand else get_rows_or_404
+    reviews = await fetch(db, apply_keyset(query, REVIEW_SORT, cursor, limit), error_message)
+
+    page = build_page(reviews, REVIEW_SORT, limit)
+    if histogram:
+        page["histograms"] = await grade_histograms(db, {review.product_id for review in page["items"]})
+
+    await release_connection(db)
+    return page
+
+
+@router.get("/")
+async def get_all_reviews(
+    db: ReadDbSessionDep,
+    format: FormatParam = "json",
+    expand: bool = False,
+    histogram: bool = False,
+    cursor: str | None = None,
+    limit: LimitParam = DEFAULT_PAGE_SIZE,
+) -> ReviewPage:
+    if format == "ndjson":
+        return ndjson_response(
+            listed_reviews(False).with_only_columns(*Review.__table__.columns).order_by(Review.id)
+        )
+
+    return await review_page(db, listed_reviews(expand), expand, histogram, cursor, limit, "There is no reviews found")
 
 
 @router.get("/{product_slug}")
-async def products_reviews(db: DbSessionDep, product_slug: str):
-    product: Product = await get_object_or_404(
-        db, select(Product).where(Product.slug == product_slug, Product.is_active == True), "There is no product found"
+@cached_response(REVIEWS, PRODUCTS)
+async def products_reviews(
+    request: Request,
+    db: ReadDbSessionDep,
+    product_slug: str,
+    expand: bool = False,
+    histogram: bool = False,
+    cursor: str | None = None,
+    limit: LimitParam = DEFAULT_PAGE_SIZE,
+) -> ReviewPage:
+    product_id: int = await get_object_or_404(
+        db, select(Product.id).where(Product.slug == product_slug, Product.is_active == True), "There is no product found"
     )
 
-    reviews = await get_objects_or_404(
-        db,
-        select(Review).where(Review.product_id == product.id, Review.is_active == True),
-        "There is no reviews for this product found",
+    query = listed_reviews(expand).where(Review.product_id == product_id)
+    return await review_page(
+        db, query, expand, histogram, cursor, limit, "There is no reviews for this product found"
     )
-    return reviews
 
 
 @router.post("/{product_slug}", status_code=status.HTTP_201_CREATED)
 @user_is_customer
 async def add_review(db: DbSessionDep, review: CreateReview, product_slug: str, curr_user: CurrUserPayloadDep) -> dict:
-    product: Product = await get_object_or_404(
-        db, select(Product).where(Product.slug == product_slug), "There is no product found"
+    product_id: int = await get_object_or_404(
+        db, select(Product.id).where(Product.slug == product_slug), "There is no product found"
     )
 
     await db.execute(
         insert(Review).values(
             user_id=curr_user.get("id"),
-            product_id=product.id,
+            product_id=product_id,
             comment=review.comment,
             grade=review.grade,
             comment_date=datetime.now(),
         )
     )
 
-    await calculate_rating(db, product)
-
-    await db.commit()
+    if rating_aggregator.accepting():
+        # Neither the product row nor the cache versions are touched, so
+        # concurrent reviewers don't queue on them; the flusher bumps both.
+        await db.commit()
+        rating_aggregator.mark_dirty(product_id)
+    else:
+        await apply_rating_delta(db, product_id, review.grade, 1)
+        await db.commit()
+        await bump_version(db, REVIEWS, PRODUCTS)
 
     return {"status_code": status.HTTP_201_CREATED, "transaction": "Review successfully created"}
 
 
 @router.delete("/")
+@query_budget(3)
 @user_is_admin
 async def delete_review(db: DbSessionDep, review_id: int, curr_user: CurrUserPayloadDep) -> dict:
-    review: Review = await get_object_or_404(
-        db, select(Review).where(Review.id == review_id, Review.is_active == True), "There is no review found"
-    )
-
-    product: Product = await get_object_or_404(
-        db, select(Product).where(Product.id == review.product_id), "There is no product found"
-    )
+    review = (
+        await db.execute(
+            update(Review)
+            .where(Review.id == review_id, Review.is_active == True)
+            .values(is_active=False)
+            .returning(Review.product_id, Review.grade)
+        )
+    ).one_or_none()
 
-    review.is_active = False
+    if review is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There is no review found")
 
-    await calculate_rating(db, product)
+    await apply_rating_delta(db, review.product_id, -review.grade, -1)
 
     await db.commit()
+    await bump_version(db, REVIEWS, PRODUCTS)
 
     return {"status_code": status.HTTP_200_OK, "transaction": "Review successfully deleted"}
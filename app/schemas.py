@@ -1,4 +1,11 @@
-from pydantic import BaseModel, EmailStr, Field
+from datetime import date
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, model_validator
+
+# Range of a Postgres integer column; larger values fail when bound.
+INT4_MIN = -2 ** 31
+INT4_MAX = 2 ** 31 - 1
 
 
 class CreateProduct(BaseModel):
@@ -26,3 +33,131 @@ class CreateUser(BaseModel):
 class CreateReview(BaseModel):
     comment: str | None = None
     grade: float = Field(ge=0, le=10)
+
+
+class ProductFilters(BaseModel):
+    min_price: int | None = None
+    max_price: int | None = None
+    min_rating: float | None = None
+    supplier: int | None = None
+    in_stock: bool = True
+    facets: bool = False
+
+
+class StockUpdate(BaseModel):
+    id: int | None = Field(default=None, ge=INT4_MIN, le=INT4_MAX)
+    slug: str | None = None
+    delta: int | None = Field(default=None, ge=INT4_MIN, le=INT4_MAX)
+    absolute: int | None = Field(default=None, ge=0, le=INT4_MAX)
+    price: int | None = Field(default=None, ge=0, le=INT4_MAX)
+
+    @model_validator(mode='after')
+    def check_target_and_change(self):
+        if (self.id is None) == (self.slug is None):
+            raise ValueError('Provide exactly one of id or slug')
+        if self.delta is not None and self.absolute is not None:
+            raise ValueError('Provide either delta or absolute, not both')
+        if self.delta is None and self.absolute is None and self.price is None:
+            raise ValueError('Nothing to update')
+        return self
+
+
+# Response models. List projections leave out wide columns such as
+# description; handlers select exactly these fields (see model_columns).
+# Fields backed by nullable columns stay optional so a NULL can't 500.
+
+class CategoryOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str | None = None
+    slug: str | None = None
+    parent_id: int | None = None
+
+
+class ProductListItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str | None = None
+    slug: str | None = None
+    price: int | None = None
+    image_url: str | None = None
+    stock: int | None = None
+    rating: float
+    category_id: int | None = None
+
+
+class ProductDetail(ProductListItem):
+    description: str | None = None
+    supplier_id: int | None = None
+
+
+class ProductSearchItem(ProductListItem):
+    rank: float
+
+
+class ProductSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str | None = None
+    slug: str | None = None
+
+
+class Reviewer(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    first_name: str | None = None
+
+
+class ReviewOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: int | None = None
+    product_id: int | None = None
+    comment: str | None = None
+    comment_date: date | None = None
+    grade: float | None = None
+    # Only filled in when the listing is requested with expand=true.
+    product: ProductSummary | None = None
+    customer: Reviewer | None = None
+
+
+class GradeCount(BaseModel):
+    grade: int
+    count: int
+
+
+class CategoryFacet(BaseModel):
+    category_id: int | None = None
+    count: int
+
+
+class PriceFacet(BaseModel):
+    min: int | None = None
+    max: int | None = None
+    count: int
+
+
+class ProductFacets(BaseModel):
+    categories: list[CategoryFacet]
+    price: list[PriceFacet]
+
+
+T = TypeVar('T')
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+
+class ProductPage(Page[ProductListItem]):
+    facets: ProductFacets | None = None
+
+
+class ReviewPage(Page[ReviewOut]):
+    histograms: dict[int, list[GradeCount]] | None = None
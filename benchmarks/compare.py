@@ -0,0 +1,53 @@
+"""Compare two benchmark result files route by route.
+
+    python -m benchmarks.compare benchmarks/results/abc123-asgi.json benchmarks/results/def456-asgi.json
+
+Exits non-zero when any route's p95 got slower than --threshold (default 10%).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def change(old: float | None, new: float | None) -> float | None:
+    if not old or new is None:
+        return None
+    return (new - old) / old
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline', type=Path)
+    parser.add_argument('candidate', type=Path)
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed p95 slowdown, as a fraction')
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text())
+    candidate = json.loads(args.candidate.read_text())
+    print(f'{baseline["commit"]} -> {candidate["commit"]}')
+    print(f'{"route":<40} {"rps":>9} {"p50":>9} {"p95":>9} {"p99":>9}')
+
+    regressions = []
+    for route, new in candidate['routes'].items():
+        old = baseline['routes'].get(route)
+        if old is None:
+            print(f'{route:<40} (new)')
+            continue
+
+        deltas = {
+            key: change(old[key], new[key]) for key in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms')
+        }
+        print(f'{route:<40} ' + ' '.join(
+            f'{"n/a" if delta is None else f"{delta:+.1%}":>9}' for delta in deltas.values()
+        ))
+        if deltas['p95_ms'] is not None and deltas['p95_ms'] > args.threshold:
+            regressions.append(route)
+
+    for route in regressions:
+        print(f'regression: {route} p95 slower by more than {args.threshold:.0%}')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""EXPLAIN the hot listing queries and flag sequential scans on large tables.
+
+    python -m benchmarks.plans
+
+The queries are built by the same code the routes use, so a change that
+stops them from matching the partial listing indexes shows up here. Run it
+against a seeded database: on a handful of rows the planner rightly prefers
+a sequential scan. Exits non-zero when a check fails.
+"""
+import asyncio
+import json
+import sys
+
+from sqlalchemy import Select, func, literal_column, select, text
+
+from app.backend.db import async_session_maker, engine
+from app.helpers.pagination import DEFAULT_PAGE_SIZE, apply_keyset
+from app.models import PRODUCT_LISTED, Category, Product, ProductListing, Review
+from app.models.products import SEARCH_CONFIG
+from app.routers.products import LIST_COLUMNS, PRODUCT_SORTS, SEARCH_COLUMNS, filter_products
+from app.schemas import ProductFilters
+
+LARGE_TABLES = {'products', 'product_listing', 'reviews'}
+
+
+def listing(sort: str, category_ids: list[int] | None = None) -> Select:
+    query = select(*LIST_COLUMNS).where(ProductListing.category_active == True)
+    if category_ids is not None:
+        query = query.where(ProductListing.category_id.in_(category_ids))
+    return apply_keyset(filter_products(query, ProductFilters()), PRODUCT_SORTS[sort], None, DEFAULT_PAGE_SIZE)
+
+
+def search(q: str) -> Select:
+    # REGCONFIG has no literal renderer, so spell the config out for EXPLAIN.
+    tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), q)
+    return (
+        select(*SEARCH_COLUMNS)
+        .join(Category, Category.id == Product.category_id)
+        .where(Product.search_vector.op('@@')(tsquery), PRODUCT_LISTED, Category.is_active == True)
+        .order_by(func.ts_rank_cd(Product.search_vector, tsquery).desc(), Product.id.desc())
+        .limit(DEFAULT_PAGE_SIZE + 1)
+    )
+
+
+async def sample_ids(db) -> tuple[list[int], int]:
+    category_ids = list((await db.scalars(select(Category.id).where(Category.is_active == True).limit(3))).all())
+    product_id = await db.scalar(select(Review.product_id).where(Review.is_active == True).limit(1))
+    return category_ids, product_id or 0
+
+
+def seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in LARGE_TABLES:
+        found.append(plan['Relation Name'])
+    for child in plan.get('Plans', ()):
+        found.extend(seq_scans(child))
+    return found
+
+
+async def check_plans() -> list[dict]:
+    async with async_session_maker() as db:
+        category_ids, product_id = await sample_ids(db)
+        checks = {
+            **{f'product listing by {sort}': listing(sort) for sort in PRODUCT_SORTS},
+            **{f'category listing by {sort}': listing(sort, category_ids) for sort in PRODUCT_SORTS},
+            'product search': search('product'),
+            'reviews of a product': (
+                select(Review.id)
+                .where(Review.product_id == product_id, Review.is_active == True)
+                .order_by(Review.id)
+                .limit(DEFAULT_PAGE_SIZE + 1)
+            ),
+        }
+
+        results = []
+        for name, query in checks.items():
+            sql = query.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True})
+            plan = await db.scalar(text(f'EXPLAIN (FORMAT JSON) {sql}'))
+            root = (json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan']
+            scans = seq_scans(root)
+            results.append({'name': name, 'ok': not scans, 'seq_scans': scans, 'total_cost': root['Total Cost']})
+    return results
+
+
+def main() -> None:
+    results = asyncio.run(check_plans())
+    for result in results:
+        status = 'ok' if result['ok'] else f'SEQ SCAN on {", ".join(result["seq_scans"])}'
+        print(f'{result["name"]:<35} cost {result["total_cost"]:>12}  {status}')
+    sys.exit(0 if all(result['ok'] for result in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""Drive every API route and record throughput and latency percentiles.
+
+    python -m benchmarks.seed --products 100000
+    python -m benchmarks.run --mode asgi --requests 500 --concurrency 20
+    python -m benchmarks.run --mode uvicorn --workers 4 --writes
+
+asgi calls app.main:app in-process through httpx.ASGITransport, which
+isolates handler and database cost. uvicorn starts real workers and goes
+through the network stack. Results are written as JSON (see
+benchmarks.compare for diffing two runs).
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+from sqlalchemy import func, select
+
+from app.backend.db import async_session_maker
+from app.models import Category, Product, User
+from benchmarks.plans import check_plans
+from benchmarks.scenarios import SCENARIOS, Context, Scenario
+from benchmarks.seed import BENCH_PASSWORD, PREFIX
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float | None:
+    """Nearest-rank percentile of an already sorted list, None if it is empty."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], statuses: Counter, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    # --requests 0 (e.g. a warmup-only run) leaves nothing to rank.
+    ms = lambda seconds: None if seconds is None else round(seconds * 1000, 3)
+    return {
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'max_ms': ms(latencies[-1] if latencies else None),
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def uncovered_routes() -> list[str]:
+    """Router endpoints that have no scenario, so new routes don't go unmeasured."""
+    from app.main import app
+
+    covered = {scenario.name for scenario in SCENARIOS}
+    missing = []
+    for route in app.routes:
+        for method in sorted(getattr(route, 'methods', None) or ()):
+            name = f'{method} {route.path}'
+            if method != 'HEAD' and route.path not in ('/docs', '/redoc', '/openapi.json', '/docs/oauth2-redirect') \
+                    and name not in covered:
+                missing.append(name)
+    return missing
+
+
+async def load_context() -> Context:
+    async with async_session_maker() as db:
+        products = await db.scalar(select(func.count()).where(Product.slug.startswith(f'{PREFIX}product-')))
+        categories = await db.scalar(select(func.count()).where(Category.slug.startswith(f'{PREFIX}category-')))
+        if not products or not categories:
+            sys.exit('No benchmark data found; run `python -m benchmarks.seed` first')
+
+        users = dict((await db.execute(
+            select(User.username, User.id).where(User.username.in_(
+                [f'{PREFIX}admin', f'{PREFIX}supplier', f'{PREFIX}customer', f'{PREFIX}customer-1']
+            ))
+        )).all())
+        ids = {
+            'admin': users[f'{PREFIX}admin'],
+            'supplier': users[f'{PREFIX}supplier'],
+            'customer': users[f'{PREFIX}customer'],
+            'toggle': users[f'{PREFIX}customer-1'],
+            'category': await db.scalar(select(Category.id).where(Category.slug == f'{PREFIX}category-1')),
+            'product': await db.scalar(select(Product.id).where(Product.slug == f'{PREFIX}product-1')),
+        }
+    return Context(products=products, categories=categories, ids=ids)
+
+
+async def login(client: httpx.AsyncClient, ctx: Context) -> None:
+    for role in ('admin', 'supplier', 'customer'):
+        response = await client.post('/auth/token', data={'username': f'{PREFIX}{role}', 'password': BENCH_PASSWORD})
+        response.raise_for_status()
+        ctx.tokens[role] = response.json()['access_token']
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, ctx: Context, args) -> dict:
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    counter = iter(range(args.warmup + args.requests))
+
+    async def send(i: int, record: bool) -> None:
+        setup = await scenario.setup(ctx, i) if scenario.setup else {}
+        request = scenario.build(ctx, i, setup)
+        headers = ctx.auth(scenario.role) if scenario.role else None
+
+        start = time.perf_counter()
+        response = await client.request(scenario.method, headers=headers, **request)
+        elapsed = time.perf_counter() - start
+
+        if record:
+            latencies.append(elapsed)
+            statuses[response.status_code] += 1
+
+    for i in range(args.warmup):
+        await send(next(counter), False)
+
+    async def worker() -> None:
+        for i in counter:
+            await send(i, True)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def client_for(args):
+    if args.mode == 'asgi':
+        from app.main import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            yield client
+        return
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(args.workers), '--log-level', 'warning'],
+        cwd=ROOT, env=os.environ.copy(),
+    )
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits) as client:
+            for _ in range(300):
+                try:
+                    if (await client.get('/health')).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError('uvicorn did not start')
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def run(args) -> dict:
+    ctx = await load_context()
+    scenarios = [
+        scenario for scenario in SCENARIOS
+        if (args.writes or not scenario.write) and (not args.route or any(r in scenario.name for r in args.route))
+    ]
+
+    routes = {}
+    async with client_for(args) as client:
+        await login(client, ctx)
+        for scenario in scenarios:
+            summary = routes[scenario.name] = await run_scenario(client, scenario, ctx, args)
+            # str() so a None from an empty run still pads.
+            print(f'{scenario.name:<40} {str(summary["throughput_rps"]):>9} rps  '
+                  f'p50 {str(summary["p50_ms"]):>8} ms  p99 {str(summary["p99_ms"]):>8} ms  '
+                  f'{summary["statuses"]}')
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'mode': args.mode,
+        'workers': args.workers if args.mode == 'uvicorn' else None,
+        'concurrency': args.concurrency,
+        'requests_per_route': args.requests,
+        'scale': {'products': ctx.products, 'categories': ctx.categories},
+        'uncovered_routes': uncovered_routes(),
+        'plans': await check_plans(),
+        'routes': routes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=['asgi', 'uvicorn'], default='asgi')
+    parser.add_argument('--workers', type=int, default=4, help='uvicorn workers')
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per route')
+    parser.add_argument('--warmup', type=int, default=10, help='unmeasured requests per route')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--writes', action='store_true', help='also benchmark routes that modify data')
+    parser.add_argument('--route', action='append', help='only routes containing this text; repeatable')
+    parser.add_argument('--output', type=Path, help='defaults to benchmarks/results/<commit>-<mode>.json')
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    output = args.output or RESULTS_DIR / f'{result["commit"] or "unknown"}-{args.mode}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f'Results written to {output}')
+
+    for warning in result['uncovered_routes']:
+        print(f'warning: no scenario for {warning}')
+    for plan in result['plans']:
+        if not plan['ok']:
+            print(f'warning: {plan["name"]} scans {", ".join(plan["seq_scans"])} sequentially')
+
+
+if __name__ == '__main__':
+    main()
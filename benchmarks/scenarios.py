@@ -0,0 +1,197 @@
+"""One request factory per route in app/routers, run against seeded data.
+
+Each scenario builds the i-th request from a Context. Write scenarios that
+consume a row (deletes) get it from `setup`, which runs untimed before the
+request and writes straight to the database.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+from sqlalchemy import insert
+
+from app.backend.db import async_session_maker
+from app.helpers.review import apply_rating_delta
+from app.models import Category, Product, Review, User
+from benchmarks.seed import PREFIX
+
+SORTS = ['id', 'newest', 'rating', 'price', 'price_desc']
+
+
+@dataclass
+class Context:
+    products: int
+    categories: int
+    ids: dict[str, int]
+    tokens: dict[str, str] = field(default_factory=dict)
+    run_id: str = field(default_factory=lambda: uuid4().hex[:8])
+
+    def product(self, i: int) -> str:
+        # Spread requests over the catalog, skipping the inactive every-50th product.
+        n = 1 + (i * 7919) % self.products
+        return f'{PREFIX}product-{n + 1 if n % 50 == 0 else n}'
+
+    def category(self, i: int) -> str:
+        return f'{PREFIX}category-{1 + i % self.categories}'
+
+    def unique(self, i: int) -> str:
+        return f'Bench {self.run_id} {i}'
+
+    def auth(self, role: str) -> dict:
+        return {'Authorization': f'Bearer {self.tokens[role]}'}
+
+
+@dataclass
+class Scenario:
+    method: str
+    route: str
+    build: Callable[[Context, int, dict], dict]
+    role: str | None = None
+    write: bool = False
+    setup: Callable[[Context, int], Awaitable[dict]] | None = None
+
+    @property
+    def name(self) -> str:
+        return f'{self.method} {self.route}'
+
+
+async def _insert(statement) -> int:
+    async with async_session_maker() as db:
+        row_id = await db.scalar(statement)
+        await db.commit()
+        return row_id
+
+
+async def new_category(ctx: Context, i: int) -> dict:
+    slug = f'{PREFIX}{ctx.run_id}-delete-{i}'
+    await _insert(insert(Category).values(name=slug, slug=slug, is_active=True).returning(Category.id))
+    return {'slug': slug}
+
+
+async def new_product(ctx: Context, i: int) -> dict:
+    slug = f'{PREFIX}{ctx.run_id}-delete-{i}'
+    await _insert(insert(Product).values(
+        name=slug, slug=slug, description='d', price=1, image_url='u', stock=1,
+        category_id=ctx.ids['category'], supplier_id=ctx.ids['supplier'], is_active=True,
+    ).returning(Product.id))
+    return {'slug': slug}
+
+
+async def new_review(ctx: Context, i: int) -> dict:
+    grade = 5
+    async with async_session_maker() as db:
+        review_id = await db.scalar(insert(Review).values(
+            user_id=ctx.ids['customer'], product_id=ctx.ids['product'], grade=grade, comment_date=date.today(),
+            is_active=True,
+        ).returning(Review.id))
+        # Keep the running totals in step, as add_review would; the delete
+        # under test subtracts this grade again.
+        await apply_rating_delta(db, ctx.ids['product'], grade, 1)
+        await db.commit()
+    return {'review_id': review_id}
+
+
+async def new_user(ctx: Context, i: int) -> dict:
+    username = f'{PREFIX}{ctx.run_id}-delete-{i}'
+    user_id = await _insert(insert(User).values(
+        username=username, email=f'{username}@example.com', first_name='Bench', last_name='User',
+        hashed_password='-', is_active=True,
+    ).returning(User.id))
+    return {'user_id': user_id}
+
+
+def product_body(name: str, ctx: Context) -> dict:
+    return {
+        'name': name, 'description': 'Benchmark product', 'price': 100, 'image_url': 'u',
+        'stock': 10, 'category': ctx.ids['category'],
+    }
+
+
+def user_body(username: str) -> dict:
+    return {
+        'first_name': 'Bench', 'last_name': 'User', 'username': username,
+        'email': f'{username}@example.com', 'password': 'bench-password',
+    }
+
+
+SCENARIOS = [
+    Scenario('GET', '/', lambda ctx, i, s: {'url': '/'}),
+    Scenario('GET', '/health', lambda ctx, i, s: {'url': '/health'}),
+
+    Scenario('GET', '/categories/', lambda ctx, i, s: {'url': '/categories/'}),
+    Scenario('POST', '/categories/', lambda ctx, i, s: {
+        'url': '/categories/', 'json': {'name': ctx.unique(i)},
+    }, role='admin', write=True),
+    Scenario('PUT', '/categories/{category_slug}', lambda ctx, i, s: {
+        'url': f'/categories/{PREFIX}category-1', 'json': {'name': 'Bench category 1'},
+    }, role='admin', write=True),
+    Scenario('DELETE', '/categories/{category_slug}', lambda ctx, i, s: {
+        'url': f'/categories/{s["slug"]}',
+    }, role='admin', write=True, setup=new_category),
+
+    Scenario('GET', '/products/', lambda ctx, i, s: {
+        'url': '/products/', 'params': {'sort': SORTS[i % len(SORTS)]},
+    }),
+    Scenario('POST', '/products/', lambda ctx, i, s: {
+        'url': '/products/', 'json': product_body(ctx.unique(i), ctx),
+    }, role='supplier', write=True),
+    Scenario('POST', '/products/bulk', lambda ctx, i, s: {
+        'url': '/products/bulk', 'json': [product_body(f'{ctx.unique(i)} {n}', ctx) for n in range(20)],
+    }, role='supplier', write=True),
+    Scenario('PATCH', '/products/stock', lambda ctx, i, s: {
+        'url': '/products/stock',
+        'json': [{'slug': ctx.product(i * 20 + n), 'delta': 1 if i % 2 else -1} for n in range(20)],
+    }, role='supplier', write=True),
+    Scenario('GET', '/products/search', lambda ctx, i, s: {
+        'url': '/products/search', 'params': {'q': f'product {1 + i % ctx.products}'},
+    }),
+    Scenario('GET', '/products/{category_slug}', lambda ctx, i, s: {
+        'url': f'/products/{ctx.category(i)}', 'params': {'sort': SORTS[i % len(SORTS)]},
+    }),
+    Scenario('GET', '/products/detail/{product_slug}', lambda ctx, i, s: {
+        'url': f'/products/detail/{ctx.product(i)}',
+    }),
+    Scenario('PUT', '/products/{product_slug}', lambda ctx, i, s: {
+        'url': f'/products/{PREFIX}product-1', 'json': product_body('Bench product 1', ctx),
+    }, role='supplier', write=True),
+    Scenario('DELETE', '/products/{product_slug}', lambda ctx, i, s: {
+        'url': f'/products/{s["slug"]}',
+    }, role='supplier', write=True, setup=new_product),
+
+    Scenario('POST', '/auth/token', lambda ctx, i, s: {
+        'url': '/auth/token', 'data': {'username': f'{PREFIX}customer', 'password': 'bench-password'},
+    }),
+    Scenario('POST', '/auth/', lambda ctx, i, s: {
+        'url': '/auth/', 'json': user_body(f'{PREFIX}{ctx.run_id}-user-{i}'),
+    }, write=True),
+    Scenario('POST', '/auth/superuser', lambda ctx, i, s: {
+        'url': '/auth/superuser', 'json': user_body(f'{PREFIX}{ctx.run_id}-admin-{i}'),
+    }, write=True),
+    Scenario('GET', '/auth/read_current_user', lambda ctx, i, s: {
+        'url': '/auth/read_current_user',
+    }, role='customer'),
+
+    Scenario('PATCH', '/permission/supplier', lambda ctx, i, s: {
+        'url': '/permission/supplier', 'params': {'user_id': ctx.ids['toggle']},
+    }, role='admin', write=True),
+    Scenario('PATCH', '/permission/customer', lambda ctx, i, s: {
+        'url': '/permission/customer', 'params': {'user_id': ctx.ids['toggle']},
+    }, role='admin', write=True),
+    Scenario('DELETE', '/permission/delete', lambda ctx, i, s: {
+        'url': '/permission/delete', 'params': s,
+    }, role='admin', write=True, setup=new_user),
+
+    Scenario('GET', '/reviews/', lambda ctx, i, s: {
+        'url': '/reviews/', 'params': {'expand': i % 2 == 0},
+    }),
+    Scenario('GET', '/reviews/{product_slug}', lambda ctx, i, s: {
+        'url': f'/reviews/{ctx.product(i)}', 'params': {'histogram': i % 2 == 0},
+    }),
+    Scenario('POST', '/reviews/{product_slug}', lambda ctx, i, s: {
+        'url': f'/reviews/{ctx.product(i)}', 'json': {'grade': i % 11, 'comment': 'Benchmark review'},
+    }, role='customer', write=True),
+    Scenario('DELETE', '/reviews/', lambda ctx, i, s: {
+        'url': '/reviews/', 'params': s,
+    }, role='admin', write=True, setup=new_review),
+]
@@ -0,0 +1,185 @@
+"""Seed the configured database with synthetic benchmark data.
+
+    python -m benchmarks.seed --products 100000 --reviews-per-product 5
+
+Everything created here, and by benchmark runs, gets a "bench-" slug or
+username of one of the exact shapes in BENCH_SLUGS and BENCH_USERNAMES, so
+each run replaces the previous one without touching real data such as a
+"Bench press" product; --reset-only just removes it. Rows are generated
+inside Postgres with generate_series, which keeps 1M products to a few
+minutes on a laptop.
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import ARRAY, Integer, bindparam, delete, insert, or_, select, text
+
+from app.backend.db import async_session_maker, engine
+from app.helpers.auth import bcrypt_context
+from app.helpers.versions import CATEGORIES, PRODUCTS, REVIEWS, bump_version
+from app.models import Category, Product, Review, User
+
+PREFIX = 'bench-'
+BENCH_PASSWORD = 'bench-password'
+
+# Seeded rows, plus the ones runs create through the API or in setup, which
+# carry the 8 hex digit run id (see Context.run_id).
+RUN_ID = '[0-9a-f]{8}'
+BENCH_SLUGS = f'^{PREFIX}(product-[0-9]+|category-[0-9]+|{RUN_ID}-.+)$'
+BENCH_USERNAMES = f'^{PREFIX}(admin|supplier|customer|customer-[0-9]+|{RUN_ID}-(user|admin|delete)-[0-9]+)$'
+
+# Accounts the runner logs in with; more customers are added with --users.
+ROLES = {
+    'admin': {'is_admin': True, 'is_supplier': False, 'is_customer': False},
+    'supplier': {'is_admin': False, 'is_supplier': True, 'is_customer': False},
+    'customer': {'is_admin': False, 'is_supplier': False, 'is_customer': True},
+}
+
+INSERT_PRODUCTS = text('''
+    INSERT INTO products (name, slug, description, price, image_url, stock, category_id,
+                          supplier_id, rating, rating_sum, rating_count, is_active)
+    SELECT 'Bench product ' || g,
+           'bench-product-' || g,
+           'Synthetic product ' || g || ' generated for load testing',
+           1 + (g * 7919) % 5000,
+           'https://example.com/images/' || g || '.jpg',
+           (g * 31) % 100,
+           (:category_ids)[1 + g % cardinality(:category_ids)],
+           :supplier_id,
+           0, 0, 0,
+           g % 50 <> 0
+    FROM generate_series(1, :count) AS g
+''').bindparams(bindparam('category_ids', type_=ARRAY(Integer)))
+
+# Between 1 and 2 * per_product - 1 reviews per product, per_product on average.
+INSERT_REVIEWS = text('''
+    INSERT INTO reviews (user_id, product_id, comment, comment_date, grade, is_active)
+    SELECT (:user_ids)[1 + (p.id + r) % cardinality(:user_ids)],
+           p.id,
+           'Synthetic review',
+           current_date - ((p.id + r) % 365),
+           (p.id * 13 + r * 7) % 11,
+           true
+    FROM products AS p
+    CROSS JOIN LATERAL generate_series(1, 1 + p.id % greatest(2 * :per_product - 1, 1)) AS r
+    WHERE p.slug ~ '^bench-product-[0-9]+$' AND :per_product > 0
+''').bindparams(bindparam('user_ids', type_=ARRAY(Integer)))
+
+UPDATE_RATINGS = text('''
+    UPDATE products AS p
+    SET rating_sum = s.grade_sum,
+        rating_count = s.grade_count,
+        rating = round((s.grade_sum / s.grade_count)::numeric, 2)
+    FROM (
+        SELECT product_id, sum(grade) AS grade_sum, count(*) AS grade_count
+        FROM reviews
+        WHERE is_active
+        GROUP BY product_id
+    ) AS s
+    WHERE p.id = s.product_id AND p.slug ~ '^bench-product-[0-9]+$'
+''')
+
+
+async def reset(db) -> None:
+    bench_users = select(User.id).where(User.username.regexp_match(BENCH_USERNAMES))
+    # Products created during runs belong to the bench supplier.
+    bench_products = select(Product.id).where(
+        or_(Product.slug.regexp_match(BENCH_SLUGS), Product.supplier_id.in_(bench_users))
+    )
+
+    await db.execute(delete(Review).where(
+        or_(Review.product_id.in_(bench_products), Review.user_id.in_(bench_users))
+    ))
+    await db.execute(delete(Product).where(Product.id.in_(bench_products)))
+    # Children before parents.
+    await db.execute(delete(Category).where(
+        Category.slug.regexp_match(BENCH_SLUGS), Category.parent_id.is_not(None)
+    ))
+    await db.execute(delete(Category).where(Category.slug.regexp_match(BENCH_SLUGS)))
+    await db.execute(delete(User).where(User.username.regexp_match(BENCH_USERNAMES)))
+
+
+async def create_categories(db, count: int) -> list[int]:
+    """A two-level tree: a tenth of the categories are roots."""
+    roots = max(1, count // 10)
+    ids = []
+    for n in range(1, count + 1):
+        parent_id = None if n <= roots else ids[n % roots]
+        ids.append(await db.scalar(
+            insert(Category).values(
+                name=f'Bench category {n}', slug=f'{PREFIX}category-{n}', parent_id=parent_id, is_active=True
+            ).returning(Category.id)
+        ))
+    return ids
+
+
+async def create_users(db, customers: int) -> dict:
+    hashed_password = bcrypt_context.hash(BENCH_PASSWORD)
+    rows = [
+        {'username': f'{PREFIX}{role}', 'first_name': 'Bench', 'last_name': role.title(),
+         'email': f'{PREFIX}{role}@example.com', **flags}
+        for role, flags in ROLES.items()
+    ]
+    rows += [
+        {'username': f'{PREFIX}customer-{n}', 'first_name': 'Bench', 'last_name': f'Customer {n}',
+         'email': f'{PREFIX}customer-{n}@example.com', **ROLES['customer']}
+        for n in range(1, customers + 1)
+    ]
+    for row in rows:
+        row.update(hashed_password=hashed_password, is_active=True)
+
+    result = await db.execute(insert(User).returning(User.id, User.username), rows)
+    users = {'customers': []}
+    for user_id, username in result:
+        role = username.removeprefix(PREFIX)
+        if role in ('admin', 'supplier'):
+            users[role] = user_id
+        else:
+            users['customers'].append(user_id)
+    return users
+
+
+async def seed(args: argparse.Namespace) -> None:
+    async with async_session_maker() as db:
+        started = time.perf_counter()
+        await reset(db)
+        if args.reset_only:
+            await db.commit()
+            await bump_version(db, CATEGORIES, PRODUCTS, REVIEWS)
+            print('Removed benchmark data')
+            return
+
+        category_ids = await create_categories(db, args.categories)
+        users = await create_users(db, args.users)
+        await db.execute(INSERT_PRODUCTS, {
+            'category_ids': category_ids, 'supplier_id': users['supplier'], 'count': args.products,
+        })
+        await db.execute(INSERT_REVIEWS, {
+            'user_ids': users['customers'], 'per_product': args.reviews_per_product,
+        })
+        await db.execute(UPDATE_RATINGS)
+        await db.commit()
+        await bump_version(db, CATEGORIES, PRODUCTS, REVIEWS)
+
+        # Fresh statistics, so plans match what a long-lived database would pick.
+        await db.execute(text('ANALYZE categories, products, reviews, users'))
+        await db.commit()
+    await engine.dispose()
+
+    print(f'Seeded {args.categories} categories, {args.products} products and '
+          f'{args.users} customers in {time.perf_counter() - started:.1f}s')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=10_000)
+    parser.add_argument('--categories', type=int, default=50)
+    parser.add_argument('--users', type=int, default=100, help='customer accounts writing reviews')
+    parser.add_argument('--reviews-per-product', type=int, default=5)
+    parser.add_argument('--reset-only', action='store_true', help='only remove previous benchmark data')
+    asyncio.run(seed(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()